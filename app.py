@@ -6,13 +6,18 @@ API REST para processar ideias revisadas e gerar roteiros completos
 Integrado com OpenAI GPT com segurança de chaves
 """
 
-import json
+import hashlib
+import hmac
+import itertools
 import os
-import uuid
+import re
+import secrets
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from flask import Flask, request, jsonify
-from roteirista_finance_ia import FinanceIARoteirista
+from typing import Any, Optional
+import orjson
+from flask import Flask, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from config import LISTAS_VALIDAS, REGRAS_LGPD_ETICA
 # import logging - removido temporariamente para debug
 
@@ -22,12 +27,139 @@ from config import LISTAS_VALIDAS, REGRAS_LGPD_ETICA
 #     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 # )
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask baseado em orjson
+    Serializa direto para bytes UTF-8, sem a string intermediária do json da stdlib
+    """
+
+    def _options(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._options()),
+            mimetype=self.mimetype
+        )
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Limite do corpo das requisições (128 KB); o Flask também corta leituras acima disso
+MAX_BODY_BYTES = 128 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
 
 # Handler global removido temporariamente para debug
 
 # Token de autenticação do agente (deve ser configurado via variável de ambiente)
 AUTH_TOKEN = os.getenv('AUTH_TOKEN', 'finance-ia-token-default')
+_AUTH_TOKEN_BYTES = AUTH_TOKEN.encode('utf-8')
+_BEARER_PREFIX = 'Bearer '
+_BEARER_PREFIX_LEN = len(_BEARER_PREFIX)
+
+# Padrões sensíveis removidos das mensagens de erro, compilados em uma única alternância
+_SENSITIVE_RE = re.compile(r'sk-|Bearer |api_key|token')
+
+# Trace IDs: prefixo aleatório por processo + contador monotônico (sem uuid4 por requisição)
+_trace_prefix = secrets.token_hex(4)
+_trace_counter = itertools.count(1)
+
+def _reset_trace_ids() -> None:
+    # Workers criados por fork (ex.: gunicorn --preload) recebem prefixo próprio
+    global _trace_prefix, _trace_counter
+    _trace_prefix = secrets.token_hex(4)
+    _trace_counter = itertools.count(1)
+
+os.register_at_fork(after_in_child=_reset_trace_ids)
+
+# Corpos JSON estáticos pré-serializados no import (listas e template não mudam em runtime)
+_HEALTHZ_BYTES = orjson.dumps({
+    "status": "healthy",
+    "service": "finance-ia-roteirista",
+    "version": "1.0.0"
+})
+
+_LISTAS_BYTES = orjson.dumps({
+    "listas_validas": LISTAS_VALIDAS,
+    "regras_lgpd": REGRAS_LGPD_ETICA
+})
+
+# O template só varia em data_da_semana: guardamos o corpo em duas partes e a data entra no meio
+_TEMPLATE_DATA_MARCADOR = "__DATA_DA_SEMANA__"
+_TEMPLATE_PREFIXO, _TEMPLATE_SUFIXO = orjson.dumps({
+    "template": {
+        "data_da_semana": _TEMPLATE_DATA_MARCADOR,
+        "tema": "Como organizar o orçamento familiar sem brigas",
+        "persona": "Casal",
+        "pilar": "Orçamento",
+        "formato": "Reel/Short",
+        "canal": "Instagram",
+        "cta": "Comunidade Telegram",
+        "kpi_principal": "CTR",
+        "status": "Ideia",
+        "roteirizado_em": "",
+        "publicado_em": "",
+        "lgpd_ok": "Sim",
+        "prioridade": "Alta",
+        "links_assets": "",
+        "observacoes": "dor: brigas por dinheiro | desejo: harmonia financeira"
+    },
+    "listas_validas": LISTAS_VALIDAS
+}).split(_TEMPLATE_DATA_MARCADOR.encode('utf-8'), 1)
+
+# ETags estáveis dos corpos estáticos (o do template é combinado com a data do dia)
+_LISTAS_ETAG = hashlib.blake2b(_LISTAS_BYTES, digest_size=8).hexdigest()
+_TEMPLATE_ETAG = hashlib.blake2b(_TEMPLATE_PREFIXO + _TEMPLATE_SUFIXO, digest_size=8).hexdigest()
+
+# Respostas estáticas autenticadas: cache apenas no cliente, separado por token
+_CACHE_CONTROL_ESTATICO = 'private, max-age=300'
+
+# Erros estáticos pré-serializados: (corpo JSON, status HTTP)
+ErroEstatico = tuple[bytes, int]
+
+_ERRO_TOKEN_AUSENTE: ErroEstatico = (orjson.dumps({
+    "error": "missing_auth_token",
+    "hint": "Envie Authorization: Bearer <AUTH_TOKEN>"
+}), 401)
+_ERRO_TOKEN_INVALIDO: ErroEstatico = (orjson.dumps({
+    "error": "invalid_auth_token",
+    "hint": "Token de autenticação inválido"
+}), 401)
+_ERRO_CHAVE_OPENAI_AUSENTE: ErroEstatico = (orjson.dumps({
+    "error": "missing_openai_key",
+    "hint": "Envie em X-OPENAI-API-KEY ou defina OPENAI_API_KEY"
+}), 401)
+_ERRO_CONTENT_TYPE: ErroEstatico = (orjson.dumps({
+    "error": "invalid_content_type",
+    "hint": "Content-Type deve ser application/json"
+}), 400)
+_ERRO_JSON_INVALIDO: ErroEstatico = (orjson.dumps({
+    "error": "invalid_json",
+    "hint": "O corpo deve ser um objeto JSON válido"
+}), 400)
+_ERRO_PAYLOAD_GRANDE: ErroEstatico = (orjson.dumps({
+    "error": "payload_too_large",
+    "hint": f"O corpo da requisição deve ter no máximo {MAX_BODY_BYTES} bytes"
+}), 413)
+_ERRO_INTERNO: ErroEstatico = (orjson.dumps({
+    "error": "internal_error"
+}), 500)
+
+# Endpoints que exigem Authorization: Bearer <AUTH_TOKEN> (verificado antes do handler)
+_ENDPOINTS_AUTENTICADOS = frozenset({'processar_ideia', 'validar_entrada', 'obter_listas', 'obter_template'})
+
+# Endpoints que recebem um objeto JSON no corpo (parse feito uma vez, antes do handler)
+_ENDPOINTS_JSON = frozenset({'processar_ideia', 'validar_entrada'})
 
 def mask_api_key(api_key: str) -> str:
     """
@@ -39,11 +171,65 @@ def mask_api_key(api_key: str) -> str:
     Returns:
         Chave mascarada
     """
-    if not api_key or len(api_key) < 4:
-        return "****"
-    return "****" + api_key[-4:]
+    return f"****{api_key[-4:]}" if api_key and len(api_key) >= 4 else "****"
+
+_roteirista = None
+_roteirista_lock = threading.Lock()
+
+def get_roteirista():
+    """
+    Retorna a instância única de FinanceIARoteirista do processo
+    O import é feito sob demanda (o módulo carrega o SDK da OpenAI), assim
+    /healthz, /listas e /template não pagam esse custo no cold start.
+    A instância não guarda estado por requisição: a chave OpenAI é passada
+    a cada chamada de processar_ideia_revisada
+    
+    Returns:
+        Instância compartilhada de FinanceIARoteirista
+    """
+    global _roteirista
+    if _roteirista is None:
+        with _roteirista_lock:
+            if _roteirista is None:
+                from roteirista_finance_ia import FinanceIARoteirista
+                _roteirista = FinanceIARoteirista()
+    return _roteirista
+
+def new_trace_id() -> str:
+    """
+    Gera um identificador de rastreio único no processo
+    
+    Returns:
+        ID no formato <prefixo do processo>-<contador em hex>
+    """
+    return f"{_trace_prefix}-{next(_trace_counter):x}"
 
-def get_openai_key_from_request() -> tuple[Optional[str], Optional[Dict[str, Any]]]:
+def get_json_body() -> Any:
+    """
+    Faz o parse do corpo JSON com orjson uma única vez por requisição
+    O resultado fica em flask.g (g.json_body) e é reaproveitado pela extração da chave e pelos handlers
+    
+    Returns:
+        Objeto JSON do corpo (dicionário vazio se o corpo estiver vazio)
+    """
+    if 'json_body' not in g:
+        g.json_body = orjson.loads(request.get_data(cache=True) or b'{}')
+    return g.json_body
+
+def error_response(erro: ErroEstatico):
+    """
+    Monta a resposta de um erro estático pré-serializado
+    
+    Args:
+        erro: Tupla (corpo JSON, status HTTP)
+        
+    Returns:
+        Resposta JSON com o status do erro
+    """
+    corpo, status = erro
+    return app.response_class(corpo, status=status, mimetype='application/json')
+
+def get_openai_key_from_request() -> tuple[Optional[str], Optional[ErroEstatico]]:
     """
     Extrai a chave da OpenAI da requisição seguindo a ordem de prioridade:
     1. Header X-OPENAI-API-KEY (preferencial)
@@ -51,8 +237,8 @@ def get_openai_key_from_request() -> tuple[Optional[str], Optional[Dict[str, Any
     3. Variável de ambiente OPENAI_API_KEY (fallback)
     
     Returns:
-        Tupla (chave_openai, erro_dict)
-        Se erro_dict não for None, deve retornar erro 401
+        Tupla (chave_openai, erro)
+        Se erro não for None, deve ser retornado via error_response (401)
     """
     
     # 1. Verificar header X-OPENAI-API-KEY (preferencial)
@@ -63,8 +249,8 @@ def get_openai_key_from_request() -> tuple[Optional[str], Optional[Dict[str, Any
     
     # 2. Verificar corpo JSON, campo openai_api_key (opcional)
     try:
-        if request.is_json and request.json:
-            body_key = request.json.get('openai_api_key')
+        if request.is_json:
+            body_key = get_json_body().get('openai_api_key')
             if body_key:
                 # app.logger.info(f"Chave OpenAI obtida do body: {mask_api_key(body_key)}")
                 return body_key, None
@@ -80,36 +266,50 @@ def get_openai_key_from_request() -> tuple[Optional[str], Optional[Dict[str, Any
     
     # Nenhuma fonte forneceu a chave
     # app.logger.warning("Chave OpenAI não encontrada em nenhuma fonte")
-    return None, {
-        "error": "missing_openai_key",
-        "hint": "Envie em X-OPENAI-API-KEY ou defina OPENAI_API_KEY"
-    }
+    return None, _ERRO_CHAVE_OPENAI_AUSENTE
 
-def verify_auth_token() -> Optional[Dict[str, Any]]:
+def verify_auth_token() -> Optional[ErroEstatico]:
     """
     Verifica o token de autenticação do agente
     
     Returns:
-        Dicionário de erro se token inválido, None se válido
+        Erro estático se token ausente/inválido, None se válido
     """
     auth_header = request.headers.get('Authorization', '')
     
-    if not auth_header.startswith('Bearer '):
-        return {
-            "error": "missing_auth_token",
-            "hint": "Envie Authorization: Bearer <AUTH_TOKEN>"
-        }
+    if not auth_header.startswith(_BEARER_PREFIX):
+        return _ERRO_TOKEN_AUSENTE
     
-    token = auth_header[7:]  # Remove 'Bearer '
+    token = auth_header[_BEARER_PREFIX_LEN:]  # Remove 'Bearer '
     
-    if token != AUTH_TOKEN:
-        return {
-            "error": "invalid_auth_token",
-            "hint": "Token de autenticação inválido"
-        }
+    # Comparação em tempo constante para não vazar o token por timing
+    if not hmac.compare_digest(token.encode('utf-8'), _AUTH_TOKEN_BYTES):
+        return _ERRO_TOKEN_INVALIDO
     
     return None
 
+def static_json_response(corpo: bytes, etag: str):
+    """
+    Monta a resposta de um corpo JSON estático com ETag e cabeçalhos de cache
+    Responde 304 sem corpo quando o cliente já possui a versão atual (If-None-Match)
+    
+    Args:
+        corpo: Corpo JSON já serializado
+        etag: ETag do corpo (sem aspas)
+        
+    Returns:
+        Resposta 200 com o corpo ou 304 vazia
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(corpo, mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = _CACHE_CONTROL_ESTATICO
+    response.headers['Vary'] = 'Authorization'
+    return response
+
 def sanitize_error_message(error_msg: str) -> str:
     """
     Sanitiza mensagens de erro para evitar vazamento de informações sensíveis
@@ -120,30 +320,62 @@ def sanitize_error_message(error_msg: str) -> str:
     Returns:
         Mensagem sanitizada
     """
-    # Remove possíveis chaves de API ou tokens das mensagens
-    sensitive_patterns = ['sk-', 'Bearer ', 'api_key', 'token']
+    # Remove possíveis chaves de API ou tokens das mensagens (uma única passada)
+    return _SENSITIVE_RE.sub('[REDACTED]', error_msg)
+
+@app.before_request
+def short_circuit_healthz():
+    """
+    Responde o health check com corpo pré-serializado, antes dos demais hooks
+    (limite de corpo, autenticação) e do dispatch da rota
     
-    sanitized = error_msg
-    for pattern in sensitive_patterns:
-        if pattern in sanitized:
-            sanitized = sanitized.replace(pattern, '[REDACTED]')
+    Returns:
+        Resposta 200 estática para GET /healthz ou None para seguir
+    """
+    if request.method == 'GET' and request.path == '/healthz':
+        return app.response_class(_HEALTHZ_BYTES, mimetype='application/json')
+    return None
+
+@app.before_request
+def validate_request():
+    """
+    Rejeita corpos grandes demais e requisições sem token antes de qualquer parse de JSON
+    Nos endpoints JSON, valida o Content-Type e faz o parse único do corpo (g.json_body)
+    
+    Returns:
+        Resposta de erro (413, 401 ou 400) ou None para seguir ao handler
+    """
+    if request.content_length is not None and request.content_length > MAX_BODY_BYTES:
+        return error_response(_ERRO_PAYLOAD_GRANDE)
     
-    return sanitized
+    if request.endpoint in _ENDPOINTS_AUTENTICADOS:
+        auth_error = verify_auth_token()
+        if auth_error:
+            # app.logger.warning(f"Falha na autenticação: {auth_error[0]}")
+            return error_response(auth_error)
+    
+    if request.endpoint in _ENDPOINTS_JSON:
+        if not request.is_json:
+            return error_response(_ERRO_CONTENT_TYPE)
+        try:
+            body = get_json_body()
+        except orjson.JSONDecodeError:
+            return error_response(_ERRO_JSON_INVALIDO)
+        if not isinstance(body, dict):
+            return error_response(_ERRO_JSON_INVALIDO)
+    
+    return None
 
 @app.route('/healthz', methods=['GET'])
 def health_check():
     """
     Endpoint de health check que não acessa a OpenAI
+    Normalmente respondido por short_circuit_healthz antes de chegar aqui
     
     Returns:
         Status 200 com informações básicas do sistema
     """
-    return jsonify({
-        "status": "healthy",
-        "service": "finance-ia-roteirista",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
-    }), 200
+    return app.response_class(_HEALTHZ_BYTES, mimetype='application/json'), 200
 
 @app.route('/test-debug', methods=['POST'])
 def test_debug():
@@ -159,7 +391,7 @@ def test_debug_full():
     """
     try:
         print("🧪 ENDPOINT DE TESTE COMPLETO CHAMADO!")
-        print(f"📋 Headers: {dict(request.headers)}")
+        print(f"📋 Headers: Content-Type={request.headers.get('Content-Type')} Content-Length={request.headers.get('Content-Length')}")
         print(f"📦 Body: {request.get_data(as_text=True)}")
         return jsonify({"message": "Debug test successful"}), 200
     except Exception as e:
@@ -181,46 +413,36 @@ def processar_ideia():
     Returns:
         JSON com roteiro gerado ou erro
     """
-    trace_id = str(uuid.uuid4())
+    trace_id = new_trace_id()
     print(f"🚀 REQUISIÇÃO RECEBIDA [{trace_id}]: /processar")
-    print(f"📋 Headers: {dict(request.headers)}")
-    print(f"📦 Body: {request.get_data(as_text=True)[:500]}...")
+    if app.debug:
+        print(f"📋 Headers: Content-Type={request.headers.get('Content-Type')} Content-Length={request.headers.get('Content-Length')}")
+    # Leitura única do corpo (cache=True): o parse JSON reaproveita os mesmos bytes
+    print(f"📦 Body: {request.get_data(cache=True)[:500].decode('utf-8', 'replace')}...")
     
     try:
-        # Verificar token de autenticação
-        auth_error = verify_auth_token()
-        if auth_error:
-            # app.logger.warning(f"[{trace_id}] Falha na autenticação: {auth_error['error']}")
-            return jsonify(auth_error), 401
-        
         # Obter chave da OpenAI
         openai_key, key_error = get_openai_key_from_request()
         if key_error:
             # app.logger.warning(f"[{trace_id}] Chave OpenAI ausente")
-            return jsonify(key_error), 401
+            return error_response(key_error)
         
-        # Verificar se há dados JSON na requisição
-        if not request.is_json:
-            return jsonify({
-                "error": "invalid_content_type",
-                "hint": "Content-Type deve ser application/json"
-            }), 400
+        # Corpo já validado e parseado em validate_request
+        payload = g.json_body
         
-        # Obter dados da requisição (removendo chave OpenAI para log)
-        request_data = request.json.copy() if request.json else {}
-        if 'openai_api_key' in request_data:
-            del request_data['openai_api_key']  # Remove para não logar
+        # Para log, filtrar a chave OpenAI sem copiar o payload inteiro quando o log estiver desligado
+        # app.logger.info(f"[{trace_id}] Processando ideia: {orjson.dumps({k: v for k, v in payload.items() if k != 'openai_api_key'})[:200].decode('utf-8', 'replace')}...")
         
-        # app.logger.info(f"[{trace_id}] Processando ideia: {json.dumps(request_data, ensure_ascii=False)[:200]}...")
-        
-        # Criar instância do roteirista (sem armazenar a chave)
-        roteirista = FinanceIARoteirista()
+        # Instância compartilhada do roteirista (não armazena a chave da requisição)
+        roteirista = get_roteirista()
         
         # Processar a ideia passando a chave como parâmetro
-        resultado = roteirista.processar_ideia_revisada(request.json, openai_api_key=openai_key)
+        resultado = roteirista.processar_ideia_revisada(payload, openai_api_key=openai_key)
         
         # app.logger.info(f"[{trace_id}] Processamento concluído com sucesso")
         
+        # Resposta serializada inteira (orjson, chaves ordenadas) ainda dentro do try:
+        # uma falha de serialização vira resposta de erro, não um corpo truncado após o 200
         return jsonify({
             "sucesso": True,
             "dados": resultado,
@@ -260,26 +482,14 @@ def validar_entrada():
     Returns:
         JSON com resultado da validação
     """
-    trace_id = str(uuid.uuid4())
+    trace_id = new_trace_id()
     
     try:
-        # Verificar token de autenticação
-        auth_error = verify_auth_token()
-        if auth_error:
-            return jsonify(auth_error), 401
-        
-        # Verificar se há dados JSON na requisição
-        if not request.is_json:
-            return jsonify({
-                "error": "invalid_content_type",
-                "hint": "Content-Type deve ser application/json"
-            }), 400
-        
         # Validar entrada (não precisa de chave OpenAI)
-        roteirista = FinanceIARoteirista()
+        roteirista = get_roteirista()
         
         try:
-            roteirista._validar_ideia_revisada(request.json)
+            roteirista._validar_ideia_revisada(g.json_body)
             return jsonify({
                 "valido": True,
                 "trace_id": trace_id
@@ -309,23 +519,13 @@ def obter_listas():
         JSON com listas válidas
     """
     try:
-        # Verificar token de autenticação
-        auth_error = verify_auth_token()
-        if auth_error:
-            return jsonify(auth_error), 401
-        
-        return jsonify({
-            "listas_validas": LISTAS_VALIDAS,
-            "regras_lgpd": REGRAS_LGPD_ETICA
-        }), 200
+        return static_json_response(_LISTAS_BYTES, _LISTAS_ETAG)
         
     except Exception as e:
         error_msg = sanitize_error_message(str(e))
         # app.logger.error(f"Erro ao obter listas: {error_msg}")
         
-        return jsonify({
-            "error": "internal_error"
-        }), 500
+        return error_response(_ERRO_INTERNO)
 
 @app.route('/template', methods=['GET'])
 def obter_template():
@@ -336,41 +536,17 @@ def obter_template():
         JSON com template de entrada
     """
     try:
-        # Verificar token de autenticação
-        auth_error = verify_auth_token()
-        if auth_error:
-            return jsonify(auth_error), 401
-        
-        template = {
-            "data_da_semana": datetime.now().strftime("%Y-%m-%d"),
-            "tema": "Como organizar o orçamento familiar sem brigas",
-            "persona": "Casal",
-            "pilar": "Orçamento",
-            "formato": "Reel/Short",
-            "canal": "Instagram",
-            "cta": "Comunidade Telegram",
-            "kpi_principal": "CTR",
-            "status": "Ideia",
-            "roteirizado_em": "",
-            "publicado_em": "",
-            "lgpd_ok": "Sim",
-            "prioridade": "Alta",
-            "links_assets": "",
-            "observacoes": "dor: brigas por dinheiro | desejo: harmonia financeira"
-        }
-        
-        return jsonify({
-            "template": template,
-            "listas_validas": LISTAS_VALIDAS
-        }), 200
+        data_da_semana = datetime.now().strftime("%Y-%m-%d")
+        return static_json_response(
+            _TEMPLATE_PREFIXO + data_da_semana.encode('utf-8') + _TEMPLATE_SUFIXO,
+            f"{_TEMPLATE_ETAG}-{data_da_semana}"
+        )
         
     except Exception as e:
         error_msg = sanitize_error_message(str(e))
         # app.logger.error(f"Erro ao obter template: {error_msg}")
         
-        return jsonify({
-            "error": "internal_error"
-        }), 500
+        return error_response(_ERRO_INTERNO)
 
 if __name__ == '__main__':
     
@@ -379,6 +555,9 @@ if __name__ == '__main__':
         print("⚠️  AVISO: AUTH_TOKEN não configurado ou usando valor padrão")
         print("   Configure a variável de ambiente AUTH_TOKEN")
     
+    print("⚠️  Servidor de desenvolvimento do Flask (uma requisição por vez)")
+    print("   Em produção use: gunicorn -k gevent -w 4 --worker-connections 1000 wsgi:app")
+    
     print("🚀 Finance-IA Roteirista API iniciando...")
     print(f"   Porta: {os.getenv('PORT', 5000)}")
     print(f"   Debug: {os.getenv('FLASK_DEBUG', 'False')}")
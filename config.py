@@ -5,6 +5,8 @@ Finance-IA - Configurações do Sistema de Roteirização
 Contém todas as listas válidas e configurações do sistema
 """
 
+import sys
+
 # Listas válidas para validação de entrada
 LISTAS_VALIDAS = {
     "personas": [
@@ -61,40 +63,11 @@ LISTAS_VALIDAS = {
     ]
 }
 
-# Configurações de formato por tipo de conteúdo
-CONFIGURACOES_FORMATO = {
-    "Reel/Short": {
-        "aspect_ratio": "9:16",
-        "duracao_min": 20,
-        "duracao_max": 45,
-        "segmentos_obrigatorios": ["Hook", "Passo 1", "Passo 2", "Passo 3", "Prova visual", "CTA final"]
-    },
-    
-    "YouTube Longo": {
-        "aspect_ratio": "16:9",
-        "duracao_min": 480,  # 8 minutos
-        "duracao_max": 720,  # 12 minutos
-        "capitulos_obrigatorios": ["Hook", "Contexto", "Passo a passo", "Exemplo aplicado", "Erros comuns", "CTA final"]
-    },
-    
-    "Carrossel": {
-        "aspect_ratio": "9:16",
-        "slides_min": 6,
-        "slides_max": 10,
-        "estrutura": ["Capa", "Passos", "Erro comum", "CTA"]
-    },
-    
-    "Post Telegram": {
-        "caracteres_max": 1200,
-        "elementos": ["post_texto", "enquete", "call_to_action", "resumo_do_dia"]
-    },
-    
-    "Stories/Status": {
-        "aspect_ratio": "9:16",
-        "cards_min": 3,
-        "cards_max": 5,
-        "duracao_por_card": 5
-    }
+# Mesmas listas como frozenset, para testes de pertinência O(1) na validação
+# (valores internados: strings iguais vindas de outros literais do código batem por identidade)
+LISTAS_VALIDAS_SETS = {
+    chave: frozenset(sys.intern(valor) for valor in valores)
+    for chave, valores in LISTAS_VALIDAS.items()
 }
 
 # Regras de narração
@@ -156,34 +129,6 @@ REGRAS_MUSICA = {
     ]
 }
 
-# Ajustes automáticos por KPI
-AJUSTES_KPI = {
-    "CTR": {
-        "estrategia": "CTA no meio e final, reforçar benefício claro",
-        "implementacao": "adicionar_cta_meio_video"
-    },
-    
-    "Salvamentos": {
-        "estrategia": "checklist em 3 passos e bullets copiáveis",
-        "implementacao": "formato_checklist_bullets"
-    },
-    
-    "Retenção": {
-        "estrategia": "open loop no início, variação visual a cada 3-5s",
-        "implementacao": "open_loop_inicio_variacao_visual"
-    },
-    
-    "Engajamento": {
-        "estrategia": "perguntas diretas, enquetes, call to action para comentar",
-        "implementacao": "elementos_interativos"
-    },
-    
-    "Conversão": {
-        "estrategia": "benefício claro, urgência sutil, CTA específico",
-        "implementacao": "foco_conversao"
-    }
-}
-
 # Regras LGPD e ética
 REGRAS_LGPD_ETICA = {
     "dados_proibidos": [
@@ -210,82 +155,6 @@ REGRAS_LGPD_ETICA = {
     }
 }
 
-# Templates de CTA por tipo
-TEMPLATES_CTA = {
-    "Comunidade Telegram": {
-        "texto_curto": "Entre na comunidade gratuita!",
-        "texto_completo": "Entre na nossa comunidade gratuita do Telegram e receba dicas diárias de educação financeira!",
-        "prioridade": 1
-    },
-    
-    "WhatsApp Diagnóstico": {
-        "texto_curto": "Faça seu diagnóstico gratuito!",
-        "texto_completo": "Faça seu diagnóstico financeiro gratuito em 5 minutos no WhatsApp!",
-        "prioridade": 2,
-        "condicao": "quando houver entrega imediata"
-    },
-    
-    "Download Planilha": {
-        "texto_curto": "Baixe a planilha gratuita!",
-        "texto_completo": "Baixe nossa planilha gratuita de controle financeiro e organize suas contas hoje mesmo!",
-        "prioridade": 3
-    },
-    
-    "Curso Gratuito": {
-        "texto_curto": "Inscreva-se no curso gratuito!",
-        "texto_completo": "Inscreva-se no nosso curso gratuito de educação financeira e transforme sua vida financeira!",
-        "prioridade": 4
-    }
-}
-
-# Hashtags por pilar
-HASHTAGS_POR_PILAR = {
-    "Orçamento": [
-        "#educacaofinanceira",
-        "#orcamento", 
-        "#controlefinanceiro",
-        "#economia",
-        "#dinheiro",
-        "#financas"
-    ],
-    
-    "Investimentos": [
-        "#educacaofinanceira",
-        "#investimentos",
-        "#rendapassiva", 
-        "#investir",
-        "#dinheiro",
-        "#financas"
-    ],
-    
-    "Dívidas": [
-        "#educacaofinanceira",
-        "#dividas",
-        "#quitardividas",
-        "#controlefinanceiro",
-        "#organizacaofinanceira",
-        "#financas"
-    ],
-    
-    "Renda Extra": [
-        "#educacaofinanceira",
-        "#rendaextra",
-        "#empreendedorismo",
-        "#dinheiro",
-        "#oportunidades",
-        "#financas"
-    ],
-    
-    "Planejamento": [
-        "#educacaofinanceira",
-        "#planejamentofinanceiro",
-        "#metas",
-        "#objetivos",
-        "#futuro",
-        "#financas"
-    ]
-}
-
 # Configurações de exportação
 CONFIG_EXPORTACAO = {
     "formato_data": "%Y-%m-%d",
@@ -6,13 +6,119 @@ Sistema para processar ideias revisadas e gerar roteiros completos
 Integrado com OpenAI GPT para geração inteligente de conteúdo
 """
 
-import json
+import argparse
+import calendar
+import re
 import sys
 import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from roteirista_finance_ia import FinanceIARoteirista, processar_roteiro
-from config import LISTAS_VALIDAS, REGRAS_LGPD_ETICA
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import orjson
+from roteirista_finance_ia import CAMPOS_OBRIGATORIOS, MAX_WORKERS_LOTE, FinanceIARoteirista
+from config import LISTAS_VALIDAS, LISTAS_VALIDAS_SETS, REGRAS_LGPD_ETICA
+
+def _agora_iso() -> str:
+    """
+    Timestamp informativo das respostas (ISO 8601, precisão de segundos)
+    """
+    return datetime.now().isoformat(timespec='seconds')
+
+# Data no formato YYYY-MM-DD (mês e dia em faixa; dias do mês conferidos com calendar)
+_DATA_RE = re.compile(r"(\d{4})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])")
+
+def _data_valida(valor: Any) -> bool:
+    """
+    Valida uma data YYYY-MM-DD sem criar objetos datetime
+    """
+    if not isinstance(valor, str):
+        return False
+    encontrado = _DATA_RE.fullmatch(valor)
+    if not encontrado:
+        return False
+    ano, mes, dia = (int(parte) for parte in encontrado.groups())
+    return ano >= 1 and dia <= calendar.monthrange(ano, mes)[1]
+
+# Termos que sugerem dados pessoais no tema/observações (checagem básica de LGPD)
+_TERMOS_DADOS_PESSOAIS = ("cpf", "telefone", "nome completo", "conta bancária")
+
+def _alternancia(termos) -> str:
+    """
+    Monta a alternância regex (escapada, minúscula) de uma lista de termos
+    """
+    return "|".join(re.escape(termo.lower()) for termo in termos)
+
+_LGPD_PROMESSAS_RE = re.compile(_alternancia(REGRAS_LGPD_ETICA["promessas_proibidas"]))
+# Promessas e dados pessoais em um único padrão: texto conforme (caso comum) é varrido uma só vez
+_LGPD_RE = re.compile(
+    f"(?P<promessa>{_alternancia(REGRAS_LGPD_ETICA['promessas_proibidas'])})"
+    f"|(?P<dados>{_alternancia(_TERMOS_DADOS_PESSOAIS)})"
+)
+
+_OPCOES_EMIT = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+
+def _emit(obj: Any) -> None:
+    """
+    Escreve JSON legível (indentado, UTF-8 sem escapes) direto no stdout binário, sem passar pelo TextIOWrapper
+    """
+    sys.stdout.flush()  # esvazia o texto já impresso para manter a ordem da saída
+    sys.stdout.buffer.write(orjson.dumps(obj, option=_OPCOES_EMIT))
+    sys.stdout.buffer.flush()
+
+VERSAO_SISTEMA = "1.0.0"
+
+# Respostas informativas estáticas, montadas uma vez no import
+_LISTAS_VALIDAS_RESPOSTA = {
+    "listas_validas": LISTAS_VALIDAS,
+    "versao_sistema": VERSAO_SISTEMA
+}
+
+_TEMPLATE_ENTRADA = {
+    "template": {
+        "data_da_semana": "YYYY-MM-DD",
+        "tema": "string curta (dor/desejo explícito)",
+        "persona": "valor de listas_validas.personas",
+        "pilar": "valor de listas_validas.pilares",
+        "formato": "valor de listas_validas.formatos",
+        "canal": "valor de listas_validas.canais",
+        "cta": "valor de listas_validas.ctas",
+        "kpi_principal": "valor de listas_validas.kpis",
+        "status": "Ideia",
+        "roteirizado_em": "",
+        "publicado_em": "",
+        "lgpd_ok": "Sim",
+        "prioridade": "valor de listas_validas.prioridade",
+        "links_assets": "",
+        "observacoes": "ex.: dor: ... | desejo: ..."
+    },
+    "listas_validas": LISTAS_VALIDAS
+}
+
+_CAMPOS_OBRIGATORIOS_SET = frozenset(CAMPOS_OBRIGATORIOS)
+
+# Itens do lote submetidos e ainda não entregues (os workers ficam ocupados sem acumular o lote)
+_MAX_ITENS_EM_VOO = MAX_WORKERS_LOTE * 2
+
+# Pares (campo da ideia, chave em LISTAS_VALIDAS) validados contra as listas de valores
+_VALIDACOES = (
+    ("persona", "personas"),
+    ("pilar", "pilares"),
+    ("formato", "formatos"),
+    ("canal", "canais"),
+    ("cta", "ctas"),
+    ("kpi_principal", "kpis"),
+    ("prioridade", "prioridade")
+)
+
+# (campo, valores aceitos, sufixo da mensagem de erro) já resolvidos: o laço de validação
+# não consulta dicionários e a lista de valores válidos é formatada uma única vez
+_VALIDACOES_RESOLVIDAS = tuple(
+    (campo, LISTAS_VALIDAS_SETS[lista_valida], f"Valores válidos: {LISTAS_VALIDAS[lista_valida]}")
+    for campo, lista_valida in _VALIDACOES
+)
 
 class FinanceIAAPI:
     """
@@ -21,18 +127,19 @@ class FinanceIAAPI:
     Integrado com OpenAI GPT para geração inteligente de conteúdo
     """
     
+    __slots__ = ("roteirista", "versao")
+    
     def __init__(self, openai_api_key: str = None):
-        # Usar chave fornecida ou variável de ambiente
-        api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
-        self.roteirista = FinanceIARoteirista(openai_api_key=api_key)
-        self.versao = "1.0.0"
+        # Chave repassada explicitamente; o roteirista cai para OPENAI_API_KEY se não houver
+        self.roteirista = FinanceIARoteirista(openai_api_key=openai_api_key)
+        self.versao = VERSAO_SISTEMA
     
-    def processar_ideia_json(self, ideia_json: str) -> Dict[str, Any]:
+    def processar_ideia_json(self, ideia_json: Union[str, bytes]) -> Dict[str, Any]:
         """
         Processa uma ideia revisada em formato JSON
         
         Args:
-            ideia_json: String JSON com a ideia revisada
+            ideia_json: JSON (str ou bytes) com a ideia revisada
             
         Returns:
             Dicionário com o roteiro gerado ou erro
@@ -40,8 +147,28 @@ class FinanceIAAPI:
         
         try:
             # Parse do JSON de entrada
-            ideia = json.loads(ideia_json)
+            ideia = orjson.loads(ideia_json)
+        except orjson.JSONDecodeError as e:
+            return {
+                "sucesso": False,
+                "erro": f"JSON inválido: {str(e)}",
+                "codigo_erro": "JSON_INVALIDO"
+            }
+        
+        return self.processar_ideia(ideia)
+    
+    def processar_ideia(self, ideia: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Processa uma ideia revisada já convertida em dicionário
+        
+        Args:
+            ideia: Dicionário com a ideia revisada
             
+        Returns:
+            Dicionário com o roteiro gerado ou erro
+        """
+        
+        try:
             # Validar entrada
             validacao = self.validar_entrada(ideia)
             if not validacao["valido"]:
@@ -58,15 +185,9 @@ class FinanceIAAPI:
                 "sucesso": True,
                 "dados": resultado,
                 "versao_sistema": self.versao,
-                "processado_em": datetime.now().isoformat()
+                "processado_em": _agora_iso()
             }
             
-        except json.JSONDecodeError as e:
-            return {
-                "sucesso": False,
-                "erro": f"JSON inválido: {str(e)}",
-                "codigo_erro": "JSON_INVALIDO"
-            }
         except Exception as e:
             return {
                 "sucesso": False,
@@ -85,49 +206,40 @@ class FinanceIAAPI:
             Dicionário com resultado da validação
         """
         
-        # Campos obrigatórios
-        campos_obrigatorios = [
-            "data_da_semana", "tema", "persona", "pilar", "formato",
-            "canal", "cta", "kpi_principal", "status", "prioridade"
-        ]
+        # Arrays e escalares JSON não têm campos: erro de validação, não erro interno
+        if not isinstance(ideia, dict):
+            return {
+                "valido": False,
+                "erro": "Ideia deve ser um objeto JSON"
+            }
         
-        # Verificar campos obrigatórios
-        for campo in campos_obrigatorios:
-            if campo not in ideia:
-                return {
-                    "valido": False,
-                    "erro": f"Campo obrigatório ausente: {campo}"
-                }
+        # Verificar campos obrigatórios (uma única operação de conjunto no caso comum)
+        if not _CAMPOS_OBRIGATORIOS_SET <= ideia.keys():
+            # Reporta o primeiro ausente na ordem de CAMPOS_OBRIGATORIOS, mantendo a mensagem determinística
+            campo = next(campo for campo in CAMPOS_OBRIGATORIOS if campo not in ideia)
+            return {
+                "valido": False,
+                "erro": f"Campo obrigatório ausente: {campo}"
+            }
         
-        # Validar valores contra listas válidas
-        validacoes = [
-            ("persona", "personas"),
-            ("pilar", "pilares"),
-            ("formato", "formatos"),
-            ("canal", "canais"),
-            ("cta", "ctas"),
-            ("kpi_principal", "kpis"),
-            ("prioridade", "prioridade")
-        ]
+        # Validar formato da data (falha comum e barata, checada antes das listas)
+        if not _data_valida(ideia["data_da_semana"]):
+            return {
+                "valido": False,
+                "erro": "Formato de data inválido. Use YYYY-MM-DD"
+            }
         
-        for campo, lista_valida in validacoes:
+        # Validar valores contra listas válidas (frozensets pré-construídos em config)
+        for campo, valores_validos, sufixo_erro in _VALIDACOES_RESOLVIDAS:
             valor = ideia.get(campo)
-            if valor not in LISTAS_VALIDAS[lista_valida]:
+            # isinstance evita TypeError ao buscar valores não-hasheáveis (listas, dicts) no frozenset
+            if not isinstance(valor, str) or valor not in valores_validos:
                 return {
                     "valido": False,
-                    "erro": f"Valor inválido para {campo}: {valor}. Valores válidos: {LISTAS_VALIDAS[lista_valida]}"
+                    "erro": f"Valor inválido para {campo}: {valor}. {sufixo_erro}"
                 }
         
-        # Validar formato da data
-        try:
-            datetime.strptime(ideia["data_da_semana"], "%Y-%m-%d")
-        except ValueError:
-            return {
-                "valido": False,
-                "erro": "Formato de data inválido. Use YYYY-MM-DD"
-            }
-        
-        # Validar LGPD
+        # Validar LGPD por último: é a checagem mais cara (varredura do texto livre)
         lgpd_check = self.verificar_lgpd(ideia)
         if not lgpd_check["conforme"]:
             return {
@@ -148,83 +260,63 @@ class FinanceIAAPI:
             Dicionário com resultado da verificação
         """
         
-        tema = ideia.get("tema", "").lower()
-        observacoes = ideia.get("observacoes", "").lower()
+        # Tema e observações em um único texto; o separador impede casamentos entre os dois campos
+        # (str(... or "") tolera campos nulos ou não-texto)
+        texto = (str(ideia.get("tema") or "") + "\x00" + str(ideia.get("observacoes") or "")).lower()
         
-        # Verificar promessas proibidas
-        for promessa in REGRAS_LGPD_ETICA["promessas_proibidas"]:
-            if promessa in tema or promessa in observacoes:
-                return {
-                    "conforme": False,
-                    "violacao": f"Promessa irreal detectada: '{promessa}'"
-                }
+        encontrado = _LGPD_RE.search(texto)
+        if encontrado is None:
+            return {"conforme": True}
         
-        # Verificar dados pessoais (básico)
-        termos_suspeitos = ["cpf", "telefone", "nome completo", "conta bancária"]
-        for termo in termos_suspeitos:
-            if termo in tema or termo in observacoes:
-                return {
-                    "conforme": False,
-                    "violacao": f"Possível referência a dados pessoais: '{termo}'"
-                }
+        # Promessas proibidas têm precedência: se o primeiro achado foi um dado pessoal,
+        # procura ainda uma promessa no restante do texto
+        promessa = encontrado if encontrado.lastgroup == "promessa" else \
+            _LGPD_PROMESSAS_RE.search(texto, encontrado.start() + 1)
+        if promessa:
+            return {
+                "conforme": False,
+                "violacao": f"Promessa irreal detectada: '{promessa.group(0)}'"
+            }
         
-        return {"conforme": True}
+        # Dados pessoais (básico)
+        return {
+            "conforme": False,
+            "violacao": f"Possível referência a dados pessoais: '{encontrado.group(0)}'"
+        }
     
     def obter_listas_validas(self) -> Dict[str, Any]:
         """
         Retorna todas as listas de valores válidos
         
         Returns:
-            Dicionário com listas válidas
+            Dicionário com listas válidas (compartilhado, não modificar)
         """
         
-        return {
-            "listas_validas": LISTAS_VALIDAS,
-            "versao_sistema": self.versao
-        }
+        return _LISTAS_VALIDAS_RESPOSTA
     
     def obter_template_entrada(self) -> Dict[str, Any]:
         """
         Retorna template de entrada para facilitar integração
         
         Returns:
-            Dicionário com template de entrada
+            Dicionário com template de entrada (compartilhado, não modificar)
         """
         
-        return {
-            "template": {
-                "data_da_semana": "YYYY-MM-DD",
-                "tema": "string curta (dor/desejo explícito)",
-                "persona": "valor de listas_validas.personas",
-                "pilar": "valor de listas_validas.pilares",
-                "formato": "valor de listas_validas.formatos",
-                "canal": "valor de listas_validas.canais",
-                "cta": "valor de listas_validas.ctas",
-                "kpi_principal": "valor de listas_validas.kpis",
-                "status": "Ideia",
-                "roteirizado_em": "",
-                "publicado_em": "",
-                "lgpd_ok": "Sim",
-                "prioridade": "valor de listas_validas.prioridade",
-                "links_assets": "",
-                "observacoes": "ex.: dor: ... | desejo: ..."
-            },
-            "listas_validas": LISTAS_VALIDAS
-        }
+        return _TEMPLATE_ENTRADA
     
-    def processar_lote(self, ideias_json: str) -> Dict[str, Any]:
+    def processar_lote(self, ideias_json: Union[str, bytes]) -> Dict[str, Any]:
         """
         Processa múltiplas ideias em lote
         
         Args:
-            ideias_json: String JSON com array de ideias
+            ideias_json: JSON (str ou bytes) com array de ideias
             
         Returns:
             Dicionário com resultados do lote
         """
         
         try:
-            ideias = json.loads(ideias_json)
+            ideias = orjson.loads(ideias_json)
             
             if not isinstance(ideias, list):
                 return {
@@ -233,26 +325,10 @@ class FinanceIAAPI:
                     "codigo_erro": "FORMATO_LOTE_INVALIDO"
                 }
             
-            resultados = []
-            sucessos = 0
-            erros = 0
+            resultados = list(self.iter_processar_lote(ideias))
             
-            for i, ideia in enumerate(ideias):
-                try:
-                    resultado = self.roteirista.processar_ideia_revisada(ideia)
-                    resultados.append({
-                        "indice": i,
-                        "sucesso": True,
-                        "dados": resultado
-                    })
-                    sucessos += 1
-                except Exception as e:
-                    resultados.append({
-                        "indice": i,
-                        "sucesso": False,
-                        "erro": str(e)
-                    })
-                    erros += 1
+            sucessos = sum(1 for resultado in resultados if resultado["sucesso"])
+            erros = len(resultados) - sucessos
             
             return {
                 "sucesso": True,
@@ -260,10 +336,10 @@ class FinanceIAAPI:
                 "sucessos": sucessos,
                 "erros": erros,
                 "resultados": resultados,
-                "processado_em": datetime.now().isoformat()
+                "processado_em": _agora_iso()
             }
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return {
                 "sucesso": False,
                 "erro": f"JSON inválido: {str(e)}",
@@ -276,6 +352,103 @@ class FinanceIAAPI:
                 "codigo_erro": "ERRO_INTERNO"
             }
 
+    def iter_processar_lote(self, ideias: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Processa ideias em lote entregando um resultado por vez, na ordem de entrada
+        Permite emitir cada resultado (ex.: NDJSON) sem acumular o lote inteiro
+        
+        Args:
+            ideias: Iterável de dicionários com ideias revisadas
+            
+        Yields:
+            Dicionário com o resultado de cada item
+        """
+        
+        # Cada ideia bloqueia em chamadas HTTP à OpenAI: processar em paralelo, mas com no máximo
+        # _MAX_ITENS_EM_VOO futuros pendentes (memória limitada mesmo com lotes grandes);
+        # a fila entrega os resultados na ordem de entrada
+        pendentes = deque()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS_LOTE) as executor:
+            for indice, ideia in enumerate(ideias):
+                if len(pendentes) >= _MAX_ITENS_EM_VOO:
+                    yield pendentes.popleft().result()
+                pendentes.append(executor.submit(self._processar_item_lote, indice, ideia))
+            while pendentes:
+                yield pendentes.popleft().result()
+    
+    def _processar_item_lote(self, indice: int, ideia: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Processa um item do lote; ideias inválidas são rejeitadas pela validação, sem passar
+        pelo roteirista. Qualquer falha vira erro do item, nunca do lote inteiro
+        
+        Args:
+            indice: Posição da ideia no lote
+            ideia: Dicionário com a ideia revisada
+            
+        Returns:
+            Dicionário com o resultado do item
+        """
+        
+        if not isinstance(ideia, dict):
+            return {
+                "indice": indice,
+                "sucesso": False,
+                "erro": "Ideia deve ser um objeto JSON"
+            }
+        
+        try:
+            validacao = self.validar_entrada(ideia)
+            if not validacao["valido"]:
+                return {
+                    "indice": indice,
+                    "sucesso": False,
+                    "erro": validacao["erro"]
+                }
+            
+            return {
+                "indice": indice,
+                "sucesso": True,
+                "dados": self.roteirista.processar_ideia_revisada(ideia)
+            }
+        except Exception as e:
+            return {
+                "indice": indice,
+                "sucesso": False,
+                "erro": str(e)
+            }
+
+def _criar_parser() -> argparse.ArgumentParser:
+    """
+    Monta o parser de argumentos da linha de comando
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description="Finance-IA Roteirista")
+    parser.add_argument("comando", nargs="?", help="exemplo, processar, validar, template ou listas")
+    parser.add_argument("arquivo", nargs="?", help="arquivo JSON (processar/validar)")
+    parser.add_argument("--openai-key", dest="openai_key", help="Chave da API OpenAI (ou use OPENAI_API_KEY)")
+    parser.add_argument("--server", action="store_true",
+                        help="processa uma ideia JSON por linha da entrada padrão, reaproveitando a mesma instância")
+    return parser
+
+def _servir(api: FinanceIAAPI, saida) -> None:
+    """
+    Modo worker persistente: lê uma ideia JSON por linha do stdin e responde uma linha JSON por ideia.
+    A API (e o cliente OpenAI) é construída uma única vez para todas as requisições.
+    """
+    for linha in sys.stdin.buffer:
+        if not linha.strip():
+            continue
+        saida.write(orjson.dumps(api.processar_ideia_json(linha)) + b"\n")
+        saida.flush()
+
+def _avisar_chave(openai_key: Optional[str]) -> None:
+    """
+    Informa se a CLI vai usar a OpenAI ou o modo básico
+    """
+    if openai_key:
+        print(f"✅ Usando OpenAI API (chave: ...{openai_key[-8:] if len(openai_key) > 8 else 'configurada'})")
+    else:
+        print("⚠️  OpenAI API não configurada - sistema funcionará em modo básico")
+
 def main():
     """
     Interface de linha de comando para o Finance-IA Roteirista
@@ -291,57 +464,60 @@ def main():
         print("")
         print("Opções:")
         print("  --openai-key=<chave> - Chave da API OpenAI (ou use OPENAI_API_KEY)")
+        print("  --server - Processar uma ideia JSON por linha do stdin (processo persistente)")
         return
     
-    comando = sys.argv[1].lower()
+    parser = _criar_parser()
+    args = parser.parse_args()
+    if not args.comando and not args.server:
+        parser.error("informe um comando ou --server")
+    comando = (args.comando or "").lower()
     
-    # Extrair chave da OpenAI dos argumentos
-    openai_key = None
-    for arg in sys.argv:
-        if arg.startswith('--openai-key='):
-            openai_key = arg.split('=', 1)[1]
-            break
+    # Chave da OpenAI: argumento --openai-key ou variável de ambiente (passada direto à API)
+    openai_key = args.openai_key or os.getenv('OPENAI_API_KEY')
     
-    # Se não fornecida via argumento, tentar variável de ambiente
-    if not openai_key:
-        openai_key = os.getenv('OPENAI_API_KEY')
-    
-    # Definir a chave como variável de ambiente se fornecida
-    if openai_key:
-        os.environ['OPENAI_API_KEY'] = openai_key
-        print(f"✅ Usando OpenAI API (chave: ...{openai_key[-8:] if len(openai_key) > 8 else 'configurada'})")
-    else:
-        print("⚠️  OpenAI API não configurada - sistema funcionará em modo básico")
+    if args.server:
+        # O stdout fica reservado às respostas JSON; avisos e prints internos vão para o stderr
+        saida = sys.stdout.buffer
+        with redirect_stdout(sys.stderr):
+            _avisar_chave(openai_key)
+            _servir(FinanceIAAPI(openai_api_key=openai_key), saida)
+        return
     
+    _avisar_chave(openai_key)
     api = FinanceIAAPI(openai_api_key=openai_key)
     
     if comando == "processar":
-        if len(sys.argv) < 3:
+        if not args.arquivo:
             print("Erro: Especifique o arquivo JSON")
             return
         
         try:
-            with open(sys.argv[2], 'r', encoding='utf-8') as f:
-                ideia_json = f.read()
+            # Bytes direto para o orjson (sem decodificar o arquivo para str)
+            ideia_json = Path(args.arquivo).read_bytes()
             
-            resultado = api.processar_ideia_json(ideia_json)
-            print(json.dumps(resultado, ensure_ascii=False, indent=2))
+            if ideia_json.lstrip().startswith(b'['):
+                # Lote: um resultado JSON por linha (NDJSON), emitido assim que fica pronto
+                sys.stdout.flush()  # escrevemos direto no buffer binário: esvaziar o texto pendente antes
+                for item in api.iter_processar_lote(orjson.loads(ideia_json)):
+                    sys.stdout.buffer.write(orjson.dumps(item) + b"\n")
+                    sys.stdout.buffer.flush()
+            else:
+                resultado = api.processar_ideia_json(ideia_json)
+                _emit(resultado)
             
         except FileNotFoundError:
-            print(f"Erro: Arquivo {sys.argv[2]} não encontrado")
+            print(f"Erro: Arquivo {args.arquivo} não encontrado")
         except Exception as e:
             print(f"Erro: {str(e)}")
     
     elif comando == "validar":
-        if len(sys.argv) < 3:
+        if not args.arquivo:
             print("Erro: Especifique o arquivo JSON")
             return
         
         try:
-            with open(sys.argv[2], 'r', encoding='utf-8') as f:
-                ideia_json = f.read()
-            
-            ideia = json.loads(ideia_json)
+            ideia = orjson.loads(Path(args.arquivo).read_bytes())
             validacao = api.validar_entrada(ideia)
             
             if validacao["valido"]:
@@ -350,17 +526,17 @@ def main():
                 print(f"❌ Entrada inválida: {validacao['erro']}")
             
         except FileNotFoundError:
-            print(f"Erro: Arquivo {sys.argv[2]} não encontrado")
+            print(f"Erro: Arquivo {args.arquivo} não encontrado")
         except Exception as e:
             print(f"Erro: {str(e)}")
     
     elif comando == "template":
         template = api.obter_template_entrada()
-        print(json.dumps(template, ensure_ascii=False, indent=2))
+        _emit(template)
     
     elif comando == "listas":
         listas = api.obter_listas_validas()
-        print(json.dumps(listas, ensure_ascii=False, indent=2))
+        _emit(listas)
     
     elif comando == "exemplo":
         exemplo_ideia = {
@@ -381,8 +557,8 @@ def main():
             "observacoes": "dor: brigas por dinheiro | desejo: harmonia financeira"
         }
         
-        resultado = api.processar_ideia_json(json.dumps(exemplo_ideia))
-        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        resultado = api.processar_ideia(exemplo_ideia)
+        _emit(resultado)
     
     else:
         print(f"Comando desconhecido: {comando}")
@@ -1,20 +1,69 @@
+import hashlib
 import os
-from openai import OpenAI
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+import httpx
+from openai import AuthenticationError, OpenAI, PermissionDeniedError
 
-def get_openai_client():
+try:
+    import h2  # noqa: F401  (necessário para HTTP/2 no httpx)
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+# Conexões simultâneas com a OpenAI (cobre os workers paralelos do processamento em lote)
+MAX_CONEXOES_OPENAI = 32
+
+# Novas tentativas em 429/5xx/falhas de conexão: o SDK da OpenAI já aplica backoff
+# exponencial com jitter (respeitando Retry-After); erros permanentes não são repetidos
+OPENAI_MAX_RETRIES = 5
+
+# Cliente HTTP único compartilhado por todos os clientes OpenAI do processo:
+# keep-alive e (com h2 instalado) multiplexação HTTP/2 evitam um handshake TLS por requisição
+_HTTP_CLIENT = httpx.Client(
+    http2=HTTP2_DISPONIVEL,
+    limits=httpx.Limits(max_connections=MAX_CONEXOES_OPENAI, max_keepalive_connections=MAX_CONEXOES_OPENAI),
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
+
+# Tempo (segundos) em que o resultado de validate_openai_key é reaproveitado
+VALIDACAO_TTL_S = 300
+
+# Máximo de chaves com validação em cache (as mais antigas saem primeiro)
+VALIDACOES_CACHE_MAX = 256
+
+# Cache de validação: digest da chave -> (resultado, instante de expiração em time.monotonic());
+# a chave em si não fica guardada
+_validacoes_cache = OrderedDict()
+_validacoes_lock = threading.Lock()
+
+@lru_cache(maxsize=4)
+def _build_client(api_key):
+    """
+    Cria (uma única vez por chave) o cliente OpenAI sobre o pool de conexões compartilhado.
+    """
+    return OpenAI(api_key=api_key, http_client=_HTTP_CLIENT, max_retries=OPENAI_MAX_RETRIES)
+
+def get_openai_client(api_key=None):
     """
     Retorna um cliente OpenAI configurado com a chave da API.
-    A chave deve ser definida na variável de ambiente OPENAI_API_KEY.
+    Usa a chave informada; se for None, lê a variável de ambiente OPENAI_API_KEY.
     """
-    api_key = os.getenv('OPENAI_API_KEY')
+    if api_key is None:
+        api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         raise ValueError("OPENAI_API_KEY não encontrada nas variáveis de ambiente")
     
-    return OpenAI(api_key=api_key)
+    return _build_client(api_key)
 
 def validate_openai_key(api_key):
     """
     Valida se uma chave da API OpenAI é válida.
+    Respostas definitivas (aceita ou recusada pela autenticação) ficam em cache por
+    VALIDACAO_TTL_S segundos, então uma chave revogada volta a ser checada depois desse
+    intervalo. Falhas transitórias (rede, timeout, 5xx) retornam False sem ir para o cache.
     
     Args:
         api_key (str): A chave da API para validar
@@ -22,10 +71,28 @@ def validate_openai_key(api_key):
     Returns:
         bool: True se a chave for válida, False caso contrário
     """
+    digest = hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).hexdigest()
+    agora = time.monotonic()
+    with _validacoes_lock:
+        em_cache = _validacoes_cache.get(digest)
+        if em_cache is not None and em_cache[1] > agora:
+            _validacoes_cache.move_to_end(digest)
+            return em_cache[0]
+
     try:
-        client = OpenAI(api_key=api_key)
+        client = _build_client(api_key)
         # Tenta fazer uma requisição simples para validar a chave
         client.models.list()
-        return True
+        valida = True
+    except (AuthenticationError, PermissionDeniedError):
+        valida = False
     except Exception:
-        return False
\ No newline at end of file
+        # Sem resposta definitiva da API: não guardar, a próxima chamada tenta de novo
+        return False
+
+    with _validacoes_lock:
+        _validacoes_cache[digest] = (valida, agora + VALIDACAO_TTL_S)
+        _validacoes_cache.move_to_end(digest)
+        if len(_validacoes_cache) > VALIDACOES_CACHE_MAX:
+            _validacoes_cache.popitem(last=False)
+    return valida
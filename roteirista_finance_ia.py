@@ -6,10 +6,23 @@ Sistema para gerar roteiros prontos para produção de conteúdo de educação f
 Integrado com OpenAI GPT para geração inteligente de conteúdo
 """
 
-import json
+import hashlib
 import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Any, Callable, Iterator, Union
+
+import orjson
 
 try:
     import openai
@@ -17,6 +30,489 @@ except ImportError:
     print("Aviso: Biblioteca openai não encontrada. Instale com: pip install openai")
     openai = None
 
+# Falhas da OpenAI que levam ao modo básico. Erros transitórios (429, 5xx, timeout, conexão)
+# só chegam aqui depois das novas tentativas com backoff do SDK (OPENAI_MAX_RETRIES em
+# openai_config); erros permanentes (400, chave inválida) não são repetidos. Erros de
+# programação não são capturados, para não ficarem escondidos atrás do fallback.
+_ERROS_OPENAI = (openai.OpenAIError,) if openai else ()
+
+# Campos obrigatórios da ideia revisada (na ordem em que são reportados quando ausentes)
+CAMPOS_OBRIGATORIOS = (
+    "data_da_semana", "tema", "persona", "pilar", "formato",
+    "canal", "cta", "kpi_principal", "status", "prioridade"
+)
+_CAMPOS_OBRIGATORIOS_SET = frozenset(CAMPOS_OBRIGATORIOS)
+
+# Máximo de ideias processadas em paralelo no lote (limitado pelo rate limit da OpenAI;
+# ajustável por OPENAI_MAX_CONCURRENCY)
+MAX_WORKERS_LOTE = max(1, int(os.getenv('OPENAI_MAX_CONCURRENCY', '8')))
+
+# Modelo de chat usado na geração (textos curtos de 1-2 frases cabem folgados no mini)
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+_PROMPT_SISTEMA = "Você é um especialista em educação financeira e roteirista de conteúdo. Crie conteúdo didático, empático e prático em português do Brasil para pessoas leigas em finanças. Use frases curtas, verbos de ação e evite jargões técnicos."
+
+# Mensagem de sistema fixa e byte a byte idêntica em todas as chamadas: é o prefixo que o
+# cache automático de prompts da OpenAI reaproveita (o conteúdo dinâmico vai só na mensagem do usuário)
+_MENSAGEM_SISTEMA = {
+    "role": "system",
+    "content": _PROMPT_SISTEMA
+}
+
+def _mensagens_openai(prompt: str) -> List[Dict[str, str]]:
+    """
+    Mensagens do chat (prompt de sistema fixo + prompt do usuário)
+    """
+    return [
+        _MENSAGEM_SISTEMA,
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+@lru_cache(maxsize=64)
+def _prompt_cta(cta_tipo: str) -> str:
+    """
+    Prompt de geração do CTA final para um tipo de CTA (memoizado: poucos tipos de CTA)
+    """
+    return f"""
+            Crie um CTA (Call to Action) para "{cta_tipo}".
+            
+            Regras para CTA:
+            - Seja direto e convidativo
+            - Use verbos de ação
+            - Mencione benefício claro
+            - Tom acolhedor, não agressivo
+            - Máximo 2 frases
+            - Português do Brasil
+            
+            Retorne apenas o CTA, sem explicações adicionais.
+            """
+
+# Cache persistente (SQLite) de respostas da OpenAI entre execuções; desligado se OPENAI_CACHE_PATH não for definido
+OPENAI_CACHE_PATH = os.getenv("OPENAI_CACHE_PATH")
+OPENAI_CACHE_TTL_S = 7 * 86400
+
+def _chave_cache_persistente(prompt: str, max_tokens: int) -> str:
+    """
+    Chave do cache persistente: tudo que determina a resposta (modelo, prompt, limite, temperatura)
+    """
+    return hashlib.sha256(orjson.dumps([OPENAI_MODEL, _PROMPT_SISTEMA, prompt, max_tokens, 0.7])).hexdigest()
+
+# Esquema do cache criado uma vez por processo; cada leitura/gravação usa uma conexão curta,
+# fechada ao final (threading.local seria por greenlet sob gevent e vazaria conexões)
+_esquema_cache_pronto = False
+_esquema_cache_lock = threading.Lock()
+_falha_cache_avisada = False
+
+def _conexao_cache_persistente() -> sqlite3.Connection:
+    """
+    Nova conexão com o cache persistente (o chamador fecha), criando diretório e tabela na primeira vez
+    """
+    global _esquema_cache_pronto
+    if not _esquema_cache_pronto:
+        with _esquema_cache_lock:
+            if not _esquema_cache_pronto:
+                Path(OPENAI_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+                with closing(sqlite3.connect(OPENAI_CACHE_PATH, timeout=5)) as conexao, conexao:
+                    conexao.execute(
+                        "CREATE TABLE IF NOT EXISTS respostas (chave TEXT PRIMARY KEY, texto TEXT, expira_em REAL)"
+                    )
+                _esquema_cache_pronto = True
+    return sqlite3.connect(OPENAI_CACHE_PATH, timeout=5)
+
+def _avisar_falha_cache(erro: Exception) -> None:
+    """
+    Registra (uma única vez por processo) que o cache persistente não está funcionando
+    """
+    global _falha_cache_avisada
+    if not _falha_cache_avisada:
+        _falha_cache_avisada = True
+        print(f"Aviso: cache persistente da OpenAI indisponível em {OPENAI_CACHE_PATH}: {erro}", file=sys.stderr)
+
+def _ler_cache_persistente(chave: str):
+    """
+    Resposta guardada e ainda válida para a chave, ou None (falhas do SQLite nunca interrompem a geração)
+    """
+    try:
+        with closing(_conexao_cache_persistente()) as conexao:
+            linha = conexao.execute(
+                "SELECT texto FROM respostas WHERE chave = ? AND expira_em > ?", (chave, time.time())
+            ).fetchone()
+        return linha[0] if linha else None
+    except (sqlite3.Error, OSError) as erro:
+        _avisar_falha_cache(erro)
+        return None
+
+def _gravar_cache_persistente(chave: str, texto: str) -> None:
+    """
+    Guarda a resposta por OPENAI_CACHE_TTL_S segundos
+    """
+    try:
+        with closing(_conexao_cache_persistente()) as conexao, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?)", (chave, texto, time.time() + OPENAI_CACHE_TTL_S)
+            )
+    except (sqlite3.Error, OSError) as erro:
+        _avisar_falha_cache(erro)
+
+# Memória de respostas da OpenAI (LRU): (prompt, max_tokens, digest da chave) -> texto.
+# A chave da API entra só como digest, então segredos de requisições não ficam retidos no cache
+RESPOSTAS_CACHE_MAX = 1024
+_respostas_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_respostas_lock = threading.Lock()
+
+def _digest_chave(api_key: str) -> str:
+    """
+    Identificador não reversível da chave da API para indexar caches
+    """
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).hexdigest()
+
+def _completar_openai(prompt: str, max_tokens: int, api_key: str) -> str:
+    """
+    Chamada à OpenAI memoizada por (prompt, max_tokens, digest da chave): prompts repetidos
+    (ex.: o CTA de cada tipo) não voltam à API. Exceções não são cacheadas, então falhas são refeitas.
+    """
+    chave_memoria = (prompt, max_tokens, _digest_chave(api_key))
+    with _respostas_lock:
+        texto = _respostas_cache.get(chave_memoria)
+        if texto is not None:
+            _respostas_cache.move_to_end(chave_memoria)
+            return texto
+    
+    texto = _chamar_openai(prompt, max_tokens, api_key)
+    
+    with _respostas_lock:
+        _respostas_cache[chave_memoria] = texto
+        if len(_respostas_cache) > RESPOSTAS_CACHE_MAX:
+            _respostas_cache.popitem(last=False)
+    return texto
+
+def _limpar_respostas_cache() -> None:
+    """
+    Esvazia a memória de respostas da OpenAI
+    """
+    with _respostas_lock:
+        _respostas_cache.clear()
+
+def _chamar_openai(prompt: str, max_tokens: int, api_key: str) -> str:
+    """
+    Chamada efetiva à OpenAI (o cliente da chave vem de openai_config).
+    Com OPENAI_CACHE_PATH definido, as respostas também persistem em disco entre execuções.
+    """
+    if OPENAI_CACHE_PATH:
+        chave = _chave_cache_persistente(prompt, max_tokens)
+        texto = _ler_cache_persistente(chave)
+        if texto is not None:
+            return texto
+    
+    from openai_config import get_openai_client
+    client = get_openai_client(api_key)
+    
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=_mensagens_openai(prompt),
+        max_tokens=max_tokens,
+        temperature=0.7,
+        top_p=1,
+        frequency_penalty=0,
+        presence_penalty=0
+    )
+    
+    texto = (response.choices[0].message.content or "").strip()
+    if OPENAI_CACHE_PATH and texto:
+        _gravar_cache_persistente(chave, texto)
+    return texto
+
+@lru_cache(maxsize=1)
+def _data_do_minuto(minuto: int) -> str:
+    """
+    Data local (YYYY-MM-DD) memoizada pelo minuto corrente
+    """
+    return datetime.now().strftime("%Y-%m-%d")
+
+def _hoje() -> str:
+    """
+    Data de hoje para as atualizações da planilha; o strftime roda no máximo uma vez por minuto
+    """
+    return _data_do_minuto(int(time.time() // 60))
+
+@lru_cache(maxsize=512)
+def _refinar_tema_cacheado(tema_original: str) -> str:
+    """
+    Refina o tema mantendo dor/desejo explícitos (máx. ~90 caracteres)
+    """
+    
+    if len(tema_original) <= 90:
+        return tema_original
+    
+    # Simplificar mantendo a essência: corta em 90 caracteres (contando o espaço final)
+    # e descarta a palavra incompleta, sem concatenar palavra a palavra
+    trecho = (" ".join(tema_original.split()) + " ")[:90]
+    return trecho.rsplit(" ", 1)[0] if " " in trecho else ""
+
+def _hashtags(*tags: str) -> tuple:
+    """
+    Tupla compartilhada de hashtags internadas (vocabulário pequeno e fechado)
+    """
+    return tuple(sys.intern(tag) for tag in tags)
+
+_HASHTAGS_REEL_SHORT = _hashtags("#educacaofinanceira", "#orcamento", "#economia", "#dinheiro", "#financas")
+_HASHTAGS_YOUTUBE_LONGO = _hashtags("#educacaofinanceira", "#orcamento", "#planejamentofinanceiro")
+_HASHTAGS_CARROSSEL = _hashtags("#educacaofinanceira", "#orcamento", "#dicas")
+_HASHTAGS_POST_TELEGRAM = _hashtags("#educacaofinanceira", "#orcamento", "#telegram")
+_HASHTAGS_STORIES_STATUS = _hashtags("#stories", "#educacaofinanceira", "#dicasrapidas")
+
+def _copiar_segmentos(modelos: tuple) -> List[Dict[str, Any]]:
+    """
+    Cópia independente dos segmentos-modelo para um roteiro: tuplas viram listas e dicts
+    aninhados viram dicts novos (os modelos são compartilhados entre todos os roteiros)
+    """
+    return [
+        {
+            chave: list(valor) if isinstance(valor, tuple)
+            else dict(valor) if isinstance(valor, (dict, MappingProxyType))
+            else valor
+            for chave, valor in modelo.items()
+        }
+        for modelo in modelos
+    ]
+
+# Segmentos de Reel/Short: esqueleto fixo, copiado a cada roteiro (os ajustes de KPI alteram só a cópia)
+_SEGMENTOS_REEL_SHORT = (
+    MappingProxyType({
+        "nome": "Hook",
+        "inicio_s": 0,
+        "fim_s": 2,
+        "narracao": "",  # preenchida em _gerar_roteiro_reel_short
+        "texto_na_tela": "3 PASSOS SIMPLES",
+        "visual_sugestoes": ("tipografia cinética", "ícone relacionado à dor financeira"),
+        "efeitos_corte": ("corte seco", "zoom leve"),
+        "musica_sugestao": MappingProxyType({"mood": "otimista", "bpm": "100-110", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("whoosh suave",)
+    }),
+    MappingProxyType({
+        "nome": "Passo 1",
+        "inicio_s": 2,
+        "fim_s": 8,
+        "narracao": "Primeiro passo: anote todos os seus gastos por uma semana. Use o celular, um caderno, qualquer coisa.",
+        "texto_na_tela": "PASSO 1: ANOTE TUDO",
+        "visual_sugestoes": ("ícone de anotação", "mãos escrevendo", "app de notas"),
+        "efeitos_corte": ("transição suave",),
+        "musica_sugestao": MappingProxyType({"mood": "focado", "bpm": "95-105", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("click suave",)
+    }),
+    MappingProxyType({
+        "nome": "Passo 2",
+        "inicio_s": 8,
+        "fim_s": 15,
+        "narracao": "Segundo passo: separe os gastos em categorias. Comida, transporte, lazer. Assim você vê onde o dinheiro vai.",
+        "texto_na_tela": "PASSO 2: CATEGORIZE",
+        "visual_sugestoes": ("gráfico simples por categorias", "ícones de categorias"),
+        "efeitos_corte": ("slide lateral",),
+        "musica_sugestao": MappingProxyType({"mood": "organizativo", "bpm": "100-110", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("whoosh",)
+    }),
+    MappingProxyType({
+        "nome": "Passo 3",
+        "inicio_s": 15,
+        "fim_s": 22,
+        "narracao": "Terceiro passo: defina um limite para cada categoria. Comece com 10% menos do que você gastou na semana.",
+        "texto_na_tela": "PASSO 3: DEFINA LIMITES",
+        "visual_sugestoes": ("calculadora simples", "gráfico com limites"),
+        "efeitos_corte": ("zoom in",),
+        "musica_sugestao": MappingProxyType({"mood": "determinado", "bpm": "105-115", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("ding suave",)
+    }),
+    MappingProxyType({
+        "nome": "Prova visual",
+        "inicio_s": 22,
+        "fim_s": 28,
+        "narracao": "Fazendo isso, você pode economizar até 200 reais por mês. É dinheiro que estava escapando sem você perceber.",
+        "texto_na_tela": "ECONOMIA: R$ 200/MÊS",
+        "visual_sugestoes": ("números destacados", "ícone de economia", "mini planilha"),
+        "efeitos_corte": ("destaque numérico",),
+        "musica_sugestao": MappingProxyType({"mood": "conquista", "bpm": "110-120", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("chime de sucesso",)
+    }),
+    MappingProxyType({
+        "nome": "CTA final",
+        "inicio_s": 28,
+        "fim_s": 32,
+        "narracao": "",  # preenchida em _gerar_roteiro_reel_short
+        "texto_na_tela": "LINK NA BIO",
+        "visual_sugestoes": ("call to action visual", "seta apontando"),
+        "efeitos_corte": ("fade out",),
+        "musica_sugestao": MappingProxyType({"mood": "convidativo", "bpm": "100-110", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("whoosh final",)
+    })
+)
+
+# Segmentos de YouTube Longo: esqueleto fixo, copiado a cada roteiro (os ajustes de KPI alteram só a cópia)
+_SEGMENTOS_YOUTUBE_LONGO = (
+    MappingProxyType({
+        "nome": "Hook",
+        "inicio_s": 0,
+        "fim_s": 30,
+        "narracao": "",  # preenchida em _gerar_roteiro_youtube_longo
+        "texto_na_tela": "MÉTODO COMPROVADO",
+        "visual_sugestoes": ("apresentação pessoal", "preview dos resultados"),
+        "efeitos_corte": ("cortes dinâmicos",),
+        "musica_sugestao": MappingProxyType({"mood": "inspirador", "bpm": "90-100", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("intro musical",)
+    }),
+    MappingProxyType({
+        "nome": "Contexto",
+        "inicio_s": 30,
+        "fim_s": 120,
+        "narracao": "Antes de mais nada, quero que você saiba que não está sozinho nessa. A maioria das pessoas nunca aprendeu a lidar com dinheiro na escola.",
+        "texto_na_tela": "VOCÊ NÃO ESTÁ SOZINHO",
+        "visual_sugestoes": ("estatísticas brasileiras", "gráficos de endividamento"),
+        "efeitos_corte": ("transições suaves",),
+        "musica_sugestao": MappingProxyType({"mood": "empático", "bpm": "80-90", "tipo": "biblioteca sem direitos"}),
+        "sfx_sugestao": ("transições sutis",)
+    })
+    # Adicionar mais segmentos conforme necessário
+)
+
+# Segmentos de Carrossel: esqueleto fixo, copiado a cada roteiro (os ajustes de KPI alteram só a cópia)
+_SEGMENTOS_CARROSSEL = (
+    MappingProxyType({
+        "nome": "Slide 1 - Capa",
+        "titulo": "5 Passos para Organizar seu Orçamento",
+        "texto_curto": "Método simples e prático",
+        "texto_na_tela": "SWIPE PARA VER →",
+        "sugestao_visual": "Design limpo com título destacado"
+    }),
+    MappingProxyType({
+        "nome": "Slide 2 - Passo 1",
+        "titulo": "1. ANOTE TUDO",
+        "texto_curto": "• Registre cada gasto\n• Use app ou caderno\n• Faça por 1 semana",
+        "texto_na_tela": "PASSO 1",
+        "sugestao_visual": "Ícone de anotação + bullets"
+    }),
+    MappingProxyType({
+        "nome": "Slide 3 - Passo 2",
+        "titulo": "2. CATEGORIZE",
+        "texto_curto": "• Alimentação\n• Transporte\n• Lazer\n• Contas fixas",
+        "texto_na_tela": "PASSO 2",
+        "sugestao_visual": "Ícones de categorias"
+    })
+    # Adicionar mais slides conforme necessário
+)
+
+# Segmentos de Stories/Status: esqueleto fixo, copiado a cada roteiro (os ajustes de KPI alteram só a cópia)
+_SEGMENTOS_STORIES_STATUS = (
+    MappingProxyType({
+        "nome": "Card 1",
+        "texto": "Você gasta mais do que ganha?",
+        "narracao": "Se você respondeu sim, este stories é para você!",
+        "visual_sugestoes": ("pergunta destacada", "emoji de dinheiro"),
+        "sticker_interativo": "enquete: Sim/Não",
+        "cta": "Responda a enquete"
+    }),
+    MappingProxyType({
+        "nome": "Card 2",
+        "texto": "REGRA 50-30-20",
+        "narracao": "50% essencial, 30% diversão, 20% futuro",
+        "visual_sugestoes": ("gráfico simples", "percentuais destacados"),
+        "sticker_interativo": "slider: Quanto você poupa?",
+        "cta": "Deslize para ver mais"
+    }),
+    MappingProxyType({
+        "nome": "Card 3",
+        "texto": "COMECE HOJE!",
+        "narracao": "Separe seu dinheiro em 3 categorias agora mesmo",
+        "visual_sugestoes": ("call to action", "seta apontando"),
+        "sticker_interativo": "pergunta: Qual sua meta de economia?",
+        "cta": "Entre na comunidade para mais dicas"
+    })
+)
+
+# Tabelas de fallback (sem OpenAI) por segmento / tipo de CTA
+_VISUAIS_BASE = MappingProxyType({
+    "Hook": ("tipografia cinética", "ícone chamativo"),
+    "Contexto": ("gráfico simples", "ilustração conceitual"),
+    "Passo": ("ícone de passo", "bullet point"),
+    "Exemplo": ("mockup de tela", "ilustração prática"),
+    "CTA": ("botão de ação", "seta indicativa")
+})
+
+# Visuais extras pela primeira palavra-chave contida no tema (busca por substring, na ordem:
+# "investimentos" também conta como "investimento")
+_VISUAIS_POR_TEMA = (
+    ("orçamento", ("ícone de orçamento", "planilha simples")),
+    ("investimento", ("gráfico de crescimento", "ícone de investimento")),
+    ("economia", ("cofre", "moedas")),
+)
+
+_MUSICAS_BASE = MappingProxyType({
+    "Hook": MappingProxyType({"mood": "empolgante", "bpm": "110-120"}),
+    "Contexto": MappingProxyType({"mood": "reflexivo", "bpm": "80-90"}),
+    "Passo": MappingProxyType({"mood": "focado", "bpm": "95-105"}),
+    "Exemplo": MappingProxyType({"mood": "prático", "bpm": "100-110"}),
+    "CTA": MappingProxyType({"mood": "convidativo", "bpm": "100-110"})
+})
+_MUSICA_PADRAO = MappingProxyType({"mood": "otimista", "bpm": "100-110"})
+
+_SFX_BASE = MappingProxyType({
+    "Hook": ("whoosh",),
+    "Passo": ("click suave",),
+    "CTA": ("chime",)
+})
+
+_CTAS_BASE = MappingProxyType({
+    "Comunidade Telegram": "Entre na nossa comunidade gratuita do Telegram e receba dicas diárias!",
+    "WhatsApp Diagnóstico": "Faça seu diagnóstico financeiro gratuito em 5 minutos no WhatsApp!",
+    "Download Planilha": "Baixe nossa planilha gratuita de controle financeiro!",
+    "Curso Gratuito": "Inscreva-se no nosso curso gratuito de educação financeira!"
+})
+
+# Caracteres da narração embutidos nos prompts de visual/música (~200 tokens a ~4 caracteres
+# por token); o contexto do segmento não precisa do texto inteiro
+LIMITE_NARRACAO_PROMPT = 800
+
+# Campos "chave: valor" da sugestão de música devolvida pela OpenAI
+_MUSICA_RE = re.compile(r"\b(mood|bpm|sfx)\s*:([^,\n]*)", re.IGNORECASE)
+
+# Campos "dor: ..." / "desejo: ..." das observações da planilha, separados por "|"
+_OBSERVACOES_RE = re.compile(r"\b(dor|desejo)\s*:([^|]*)", re.IGNORECASE)
+
+def _campos_rotulados(padrao: "re.Pattern[str]", texto: str) -> Dict[str, "re.Match[str]"]:
+    """
+    Campos "rótulo: valor" em uma única passada do regex (grupo 1 = rótulo, grupo 2 = valor);
+    vale a primeira ocorrência de cada rótulo, indexada em minúsculas
+    """
+    campos = {}
+    for encontrado in padrao.finditer(texto):
+        campos.setdefault(encontrado.group(1).lower(), encontrado)
+    return campos
+
+# Narrações de fallback por segmento ({tema}/{tema_minusculo} preenchidos na chamada)
+_NARRACOES_BASE = MappingProxyType({
+    "Hook": (
+        "Você sabia que {tema_minusculo}? Vou te mostrar como resolver isso.",
+        "Pare tudo! {tema} pode mudar sua vida financeira.",
+        "Atenção: {tema} - vou te ensinar o passo a passo."
+    ),
+    "Contexto": (
+        "Muitas pessoas enfrentam dificuldades com {tema_minusculo}.",
+        "O problema é que {tema_minusculo} não é ensinado nas escolas.",
+        "Vamos entender por que {tema_minusculo} é tão importante."
+    ),
+    "Passo": (
+        "Primeiro passo: organize suas informações.",
+        "Segundo passo: defina suas prioridades.",
+        "Terceiro passo: coloque em prática."
+    ),
+    "CTA": (
+        "Quer aprender mais? Entre na nossa comunidade gratuita!",
+        "Gostou do conteúdo? Compartilhe com quem precisa!",
+        "Tem dúvidas? Comenta aqui embaixo!"
+    )
+})
+
 class FinanceIARoteirista:
     """
     Classe principal do Agente Roteirista do Finance-IA
@@ -24,50 +520,51 @@ class FinanceIARoteirista:
     Integrada com OpenAI GPT para geração inteligente de conteúdo
     """
     
+    # Tabelas fixas do roteirista: atributos de classe somente leitura, montados uma vez no import
+    listas_validas = MappingProxyType({
+        "personas": ("Jovem Adulto", "Casal", "Família", "Empreendedor", "Aposentado"),
+        "pilares": ("Orçamento", "Investimentos", "Dívidas", "Renda Extra", "Planejamento"),
+        "formatos": ("Reel/Short", "YouTube Longo", "Carrossel", "Post Telegram", "Stories/Status"),
+        "canais": ("Instagram", "TikTok", "YouTube", "Telegram", "WhatsApp"),
+        "ctas": ("Comunidade Telegram", "WhatsApp Diagnóstico", "Download Planilha", "Curso Gratuito"),
+        "kpis": ("CTR", "Salvamentos", "Retenção", "Engajamento", "Conversão"),
+        "prioridade": ("Alta", "Média", "Baixa")
+    })
+    
+    regras_narracao = MappingProxyType({
+        "idioma": "português do Brasil",
+        "publico": "leigos",
+        "estilo": "frases curtas, verbos de ação, sem jargões",
+        "termos_tecnicos": "explicar em 1 linha quando necessário"
+    })
+    
+    regras_visual = MappingProxyType({
+        "tipo": "categorias genéricas",
+        "exemplos": ("ícone de orçamento", "gráfico simples", "mãos ajustando planilha"),
+        "proibido": "fotos que identifiquem pessoas/dados pessoais"
+    })
+    
+    regras_musica = MappingProxyType({
+        "especificar": "mood e bpm",
+        "proibido": "músicas comerciais específicas",
+        "preferencia": "biblioteca sem direitos/livre de royalties",
+        "sfx": "sutil (whoosh, click)"
+    })
+    
+    ajustes_kpi = MappingProxyType({
+        "CTR": "CTA no meio e final, reforçar benefício claro",
+        "Salvamentos": "checklist em 3 passos e bullets copiáveis",
+        "Retenção": "open loop no início, variação visual a cada 3-5s"
+    })
+    
+    regras_lgpd = MappingProxyType({
+        "proibido": ("nomes completos", "telefones", "CPFs", "valores bancários", "prints com PII"),
+        "promessas_irreais": ("garantido", "fique rico", "100% certo"),
+        "tom": "acolhedor e não-julgador",
+        "foco": "1 ação prática hoje"
+    })
+    
     def __init__(self, openai_api_key: str = None):
-        self.listas_validas = {
-            "personas": ["Jovem Adulto", "Casal", "Família", "Empreendedor", "Aposentado"],
-            "pilares": ["Orçamento", "Investimentos", "Dívidas", "Renda Extra", "Planejamento"],
-            "formatos": ["Reel/Short", "YouTube Longo", "Carrossel", "Post Telegram", "Stories/Status"],
-            "canais": ["Instagram", "TikTok", "YouTube", "Telegram", "WhatsApp"],
-            "ctas": ["Comunidade Telegram", "WhatsApp Diagnóstico", "Download Planilha", "Curso Gratuito"],
-            "kpis": ["CTR", "Salvamentos", "Retenção", "Engajamento", "Conversão"],
-            "prioridade": ["Alta", "Média", "Baixa"]
-        }
-        
-        self.regras_narracao = {
-            "idioma": "português do Brasil",
-            "publico": "leigos",
-            "estilo": "frases curtas, verbos de ação, sem jargões",
-            "termos_tecnicos": "explicar em 1 linha quando necessário"
-        }
-        
-        self.regras_visual = {
-            "tipo": "categorias genéricas",
-            "exemplos": ["ícone de orçamento", "gráfico simples", "mãos ajustando planilha"],
-            "proibido": "fotos que identifiquem pessoas/dados pessoais"
-        }
-        
-        self.regras_musica = {
-            "especificar": "mood e bpm",
-            "proibido": "músicas comerciais específicas",
-            "preferencia": "biblioteca sem direitos/livre de royalties",
-            "sfx": "sutil (whoosh, click)"
-        }
-        
-        self.ajustes_kpi = {
-            "CTR": "CTA no meio e final, reforçar benefício claro",
-            "Salvamentos": "checklist em 3 passos e bullets copiáveis",
-            "Retenção": "open loop no início, variação visual a cada 3-5s"
-        }
-        
-        self.regras_lgpd = {
-            "proibido": ["nomes completos", "telefones", "CPFs", "valores bancários", "prints com PII"],
-            "promessas_irreais": ["garantido", "fique rico", "100% certo"],
-            "tom": "acolhedor e não-julgador",
-            "foco": "1 ação prática hoje"
-        }
-        
         # Verificar disponibilidade da OpenAI (sem armazenar a chave)
         # A chave será passada como parâmetro nos métodos que precisam
         self._openai_key_for_session = openai_api_key or os.getenv('OPENAI_API_KEY')
@@ -75,14 +572,27 @@ class FinanceIARoteirista:
             print("Aviso: OPENAI_API_KEY não configurada. Sistema funcionará em modo básico.")
         if not openai:
             print("Aviso: Biblioteca openai não instalada. Sistema funcionará em modo básico.")
+        
+        # OpenAI utilizável com a chave da sessão (resolvido uma vez; chaves por chamada em _chave_openai)
+        self.openai_disponivel = bool(openai is not None and self._openai_key_for_session)
+    
+    def _chave_openai(self, openai_api_key: str = None) -> str:
+        """
+        Chave efetiva de uma chamada (a informada ou a da sessão), ou None se a OpenAI não puder ser usada
+        """
+        if openai_api_key and openai:
+            return openai_api_key
+        return self._openai_key_for_session if self.openai_disponivel else None
     
-    def processar_ideia_revisada(self, ideia_revisada: Dict[str, Any], openai_api_key: str = None) -> Dict[str, Any]:
+    def processar_ideia_revisada(self, ideia_revisada: Dict[str, Any], openai_api_key: str = None,
+                                 cta_final: str = None) -> Dict[str, Any]:
         """
         Processa uma ideia revisada e gera o roteiro completo
         
         Args:
             ideia_revisada: Dicionário com os campos da ideia revisada
             openai_api_key: Chave da API OpenAI (opcional)
+            cta_final: Texto do CTA já gerado (opcional; evita gerá-lo de novo)
             
         Returns:
             Dicionário com o roteiro completo e atualizações da planilha
@@ -91,127 +601,124 @@ class FinanceIARoteirista:
         # Validar entrada
         self._validar_ideia_revisada(ideia_revisada)
         
-        # Gerar roteiro baseado no formato
+        # Gerar roteiro baseado no formato (o gerador já aplica os ajustes do KPI principal)
         formato = ideia_revisada["formato"]
         
-        if formato == "Reel/Short":
-            roteiro = self._gerar_roteiro_reel_short(ideia_revisada, openai_api_key=openai_api_key)
-        elif formato == "YouTube Longo":
-            roteiro = self._gerar_roteiro_youtube_longo(ideia_revisada, openai_api_key=openai_api_key)
-        elif formato == "Carrossel":
-            roteiro = self._gerar_roteiro_carrossel(ideia_revisada, openai_api_key=openai_api_key)
-        elif formato == "Post Telegram":
-            roteiro = self._gerar_roteiro_post_telegram(ideia_revisada)
-        elif formato == "Stories/Status":
-            roteiro = self._gerar_roteiro_stories_status(ideia_revisada)
-        else:
+        gerador = _GERADORES_POR_FORMATO.get(formato)
+        if gerador is None:
             raise ValueError(f"Formato não suportado: {formato}")
         
-        # Aplicar ajustes baseados no KPI
-        roteiro = self._aplicar_ajustes_kpi(roteiro, ideia_revisada["kpi_principal"])
+        gerar, usa_openai = gerador
+        if usa_openai:
+            roteiro = gerar(self, ideia_revisada, openai_api_key=openai_api_key, cta_final=cta_final)
+        else:
+            roteiro = gerar(self, ideia_revisada)
         
         # Preparar resposta final
         resposta = {
             "roteiro": roteiro,
             "atualizacoes_planilha": {
                 "status": "Em roteiro",
-                "roteirizado_em": datetime.now().strftime("%Y-%m-%d"),
+                "roteirizado_em": _hoje(),
                 "links_assets": ""
             }
         }
         
         return resposta
     
+    def processar_ideia_revisada_streaming(self, ideia_revisada: Dict[str, Any],
+                                           openai_api_key: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Versão incremental de processar_ideia_revisada para interfaces sensíveis à latência
+        
+        Args:
+            ideia_revisada: Dicionário com os campos da ideia revisada
+            openai_api_key: Chave da API OpenAI (opcional)
+            
+        Yields:
+            {"evento": "cta_parcial", "texto": ...} a cada pedaço do CTA gerado pela OpenAI e,
+            por fim, {"evento": "roteiro", "dados": ...} com a mesma resposta de processar_ideia_revisada
+        """
+        
+        self._validar_ideia_revisada(ideia_revisada)
+        
+        gerador = _GERADORES_POR_FORMATO.get(ideia_revisada["formato"])
+        if gerador is None:
+            raise ValueError(f"Formato não suportado: {ideia_revisada['formato']}")
+        
+        cta_final = None
+        if gerador[1]:
+            # O CTA é a única parte gerada pela OpenAI: transmiti-lo enquanto é gerado
+            partes = []
+            for parte in self._gerar_cta_final_stream(ideia_revisada["cta"], openai_api_key=openai_api_key):
+                partes.append(parte)
+                yield {"evento": "cta_parcial", "texto": parte}
+            cta_final = "".join(partes).strip()
+            if not cta_final:
+                # Stream sem conteúdo: mesmo CTA que o caminho sem streaming entregaria
+                cta_final = self._gerar_cta_final(ideia_revisada["cta"], openai_api_key=openai_api_key)
+                yield {"evento": "cta_parcial", "texto": cta_final}
+        
+        yield {
+            "evento": "roteiro",
+            "dados": self.processar_ideia_revisada(ideia_revisada, openai_api_key=openai_api_key, cta_final=cta_final)
+        }
+    
+    def processar_lote(self, ideias: List[Dict[str, Any]], openai_api_key: str = None,
+                       max_workers: int = MAX_WORKERS_LOTE) -> List[Dict[str, Any]]:
+        """
+        Processa várias ideias revisadas em paralelo (o trabalho é dominado pela espera da OpenAI)
+        
+        Args:
+            ideias: Lista de dicionários com ideias revisadas
+            openai_api_key: Chave da API OpenAI (opcional)
+            max_workers: Máximo de ideias em processamento simultâneo (limita as chamadas à OpenAI)
+            
+        Returns:
+            Respostas de processar_ideia_revisada, na ordem de entrada
+            (a primeira exceção de uma ideia é propagada)
+        """
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda ideia: self.processar_ideia_revisada(ideia, openai_api_key=openai_api_key),
+                ideias
+            ))
+    
+    def to_json(self, roteiro: Dict[str, Any]) -> bytes:
+        """
+        Serializa um roteiro (ou a resposta de processar_ideia_revisada) em JSON UTF-8 com orjson
+        
+        Args:
+            roteiro: Dicionário a serializar
+            
+        Returns:
+            Bytes JSON compactos, prontos para gravar em disco ou enviar por HTTP
+        """
+        return orjson.dumps(roteiro, option=orjson.OPT_NON_STR_KEYS)
+    
     def _validar_ideia_revisada(self, ideia: Dict[str, Any]) -> None:
         """
         Valida se a ideia revisada contém todos os campos obrigatórios
         """
-        campos_obrigatorios = [
-            "data_da_semana", "tema", "persona", "pilar", "formato",
-            "canal", "cta", "kpi_principal", "status", "prioridade"
-        ]
-        
-        for campo in campos_obrigatorios:
-            if campo not in ideia:
-                raise ValueError(f"Campo obrigatório ausente: {campo}")
+        _validar_ideia(ideia)
     
-    def _gerar_roteiro_reel_short(self, ideia: Dict[str, Any], openai_api_key: str = None) -> Dict[str, Any]:
+    def _gerar_roteiro_reel_short(self, ideia: Dict[str, Any], openai_api_key: str = None,
+                                  cta_final: str = None) -> Dict[str, Any]:
         """
         Gera roteiro para Reel/Short (Instagram, TikTok, YouTube Shorts)
         Formato: 9:16, 20-45s
         """
         
         tema_refinado = self._refinar_tema(ideia["tema"])
-        cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
-        
-        segmentos = [
-            {
-                "nome": "Hook",
-                "inicio_s": 0,
-                "fim_s": 2,
-                "narracao": f"Você sabia que {tema_refinado.lower()}? Vou te mostrar como resolver isso em 3 passos simples.",
-                "texto_na_tela": "3 PASSOS SIMPLES",
-                "visual_sugestoes": ["tipografia cinética", "ícone relacionado à dor financeira"],
-                "efeitos_corte": ["corte seco", "zoom leve"],
-                "musica_sugestao": {"mood": "otimista", "bpm": "100-110", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["whoosh suave"]
-            },
-            {
-                "nome": "Passo 1",
-                "inicio_s": 2,
-                "fim_s": 8,
-                "narracao": "Primeiro passo: anote todos os seus gastos por uma semana. Use o celular, um caderno, qualquer coisa.",
-                "texto_na_tela": "PASSO 1: ANOTE TUDO",
-                "visual_sugestoes": ["ícone de anotação", "mãos escrevendo", "app de notas"],
-                "efeitos_corte": ["transição suave"],
-                "musica_sugestao": {"mood": "focado", "bpm": "95-105", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["click suave"]
-            },
-            {
-                "nome": "Passo 2",
-                "inicio_s": 8,
-                "fim_s": 15,
-                "narracao": "Segundo passo: separe os gastos em categorias. Comida, transporte, lazer. Assim você vê onde o dinheiro vai.",
-                "texto_na_tela": "PASSO 2: CATEGORIZE",
-                "visual_sugestoes": ["gráfico simples por categorias", "ícones de categorias"],
-                "efeitos_corte": ["slide lateral"],
-                "musica_sugestao": {"mood": "organizativo", "bpm": "100-110", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["whoosh"]
-            },
-            {
-                "nome": "Passo 3",
-                "inicio_s": 15,
-                "fim_s": 22,
-                "narracao": "Terceiro passo: defina um limite para cada categoria. Comece com 10% menos do que você gastou na semana.",
-                "texto_na_tela": "PASSO 3: DEFINA LIMITES",
-                "visual_sugestoes": ["calculadora simples", "gráfico com limites"],
-                "efeitos_corte": ["zoom in"],
-                "musica_sugestao": {"mood": "determinado", "bpm": "105-115", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["ding suave"]
-            },
-            {
-                "nome": "Prova visual",
-                "inicio_s": 22,
-                "fim_s": 28,
-                "narracao": "Fazendo isso, você pode economizar até 200 reais por mês. É dinheiro que estava escapando sem você perceber.",
-                "texto_na_tela": "ECONOMIA: R$ 200/MÊS",
-                "visual_sugestoes": ["números destacados", "ícone de economia", "mini planilha"],
-                "efeitos_corte": ["destaque numérico"],
-                "musica_sugestao": {"mood": "conquista", "bpm": "110-120", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["chime de sucesso"]
-            },
-            {
-                "nome": "CTA final",
-                "inicio_s": 28,
-                "fim_s": 32,
-                "narracao": cta_final,
-                "texto_na_tela": "LINK NA BIO",
-                "visual_sugestoes": ["call to action visual", "seta apontando"],
-                "efeitos_corte": ["fade out"],
-                "musica_sugestao": {"mood": "convidativo", "bpm": "100-110", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["whoosh final"]
-            }
-        ]
+        if cta_final is None:
+            cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
+        
+        segmentos = _copiar_segmentos(_SEGMENTOS_REEL_SHORT)
+        segmentos[0]["narracao"] = f"Você sabia que {tema_refinado.lower()}? Vou te mostrar como resolver isso em 3 passos simples."
+        segmentos[-1]["narracao"] = cta_final
+        
+        legenda = _ajustar_para_kpi(ideia["kpi_principal"], segmentos, f"💰 {tema_refinado}\n\nSiga estes 3 passos simples e comece a economizar hoje mesmo!\n\n{cta_final}\n\n❓ Qual é a sua maior dificuldade com o orçamento?")
         
         return {
             "formato": ideia["formato"],
@@ -229,8 +736,8 @@ class FinanceIARoteirista:
             },
             "segmentos": segmentos,
             "meta_publicacao": {
-                "legenda": f"💰 {tema_refinado}\n\nSiga estes 3 passos simples e comece a economizar hoje mesmo!\n\n{cta_final}\n\n❓ Qual é a sua maior dificuldade com o orçamento?",
-                "hashtags": ["#educacaofinanceira", "#orcamento", "#economia", "#dinheiro", "#financas"],
+                "legenda": legenda,
+                "hashtags": list(_HASHTAGS_REEL_SHORT),
                 "thumb_titulo": "3 Passos para Economizar"
             },
             "assets_sugeridos": [
@@ -241,40 +748,21 @@ class FinanceIARoteirista:
             ]
         }
     
-    def _gerar_roteiro_youtube_longo(self, ideia: Dict[str, Any], openai_api_key: str = None) -> Dict[str, Any]:
+    def _gerar_roteiro_youtube_longo(self, ideia: Dict[str, Any], openai_api_key: str = None,
+                                     cta_final: str = None) -> Dict[str, Any]:
         """
         Gera roteiro para YouTube Longo
         Formato: 16:9, 8-12 min
         """
         
         tema_refinado = self._refinar_tema(ideia["tema"])
-        cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
-        
-        segmentos = [
-            {
-                "nome": "Hook",
-                "inicio_s": 0,
-                "fim_s": 30,
-                "narracao": f"Se você está lutando com {tema_refinado.lower()}, este vídeo vai mudar sua vida financeira. Vou te mostrar um método que já ajudou milhares de pessoas.",
-                "texto_na_tela": "MÉTODO COMPROVADO",
-                "visual_sugestoes": ["apresentação pessoal", "preview dos resultados"],
-                "efeitos_corte": ["cortes dinâmicos"],
-                "musica_sugestao": {"mood": "inspirador", "bpm": "90-100", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["intro musical"]
-            },
-            {
-                "nome": "Contexto",
-                "inicio_s": 30,
-                "fim_s": 120,
-                "narracao": "Antes de mais nada, quero que você saiba que não está sozinho nessa. A maioria das pessoas nunca aprendeu a lidar com dinheiro na escola.",
-                "texto_na_tela": "VOCÊ NÃO ESTÁ SOZINHO",
-                "visual_sugestoes": ["estatísticas brasileiras", "gráficos de endividamento"],
-                "efeitos_corte": ["transições suaves"],
-                "musica_sugestao": {"mood": "empático", "bpm": "80-90", "tipo": "biblioteca sem direitos"},
-                "sfx_sugestao": ["transições sutis"]
-            }
-            # Adicionar mais segmentos conforme necessário
-        ]
+        if cta_final is None:
+            cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
+        
+        segmentos = _copiar_segmentos(_SEGMENTOS_YOUTUBE_LONGO)
+        segmentos[0]["narracao"] = f"Se você está lutando com {tema_refinado.lower()}, este vídeo vai mudar sua vida financeira. Vou te mostrar um método que já ajudou milhares de pessoas."
+        
+        legenda = _ajustar_para_kpi(ideia["kpi_principal"], segmentos, f"🎯 {tema_refinado}\n\nNeste vídeo completo, você vai aprender:\n• Como organizar suas finanças\n• Método passo a passo\n• Exemplo prático\n• Erros que você deve evitar\n\n{cta_final}\n\n💬 Deixe seu comentário: qual sua maior dificuldade financeira?")
         
         return {
             "formato": ideia["formato"],
@@ -300,8 +788,8 @@ class FinanceIARoteirista:
                 "10:30 - Próximos passos"
             ],
             "meta_publicacao": {
-                "legenda": f"🎯 {tema_refinado}\n\nNeste vídeo completo, você vai aprender:\n• Como organizar suas finanças\n• Método passo a passo\n• Exemplo prático\n• Erros que você deve evitar\n\n{cta_final}\n\n💬 Deixe seu comentário: qual sua maior dificuldade financeira?",
-                "hashtags": ["#educacaofinanceira", "#orcamento", "#planejamentofinanceiro"],
+                "legenda": legenda,
+                "hashtags": list(_HASHTAGS_YOUTUBE_LONGO),
                 "thumb_titulo": "Como Organizar Suas Finanças"
             },
             "assets_sugeridos": [
@@ -312,39 +800,20 @@ class FinanceIARoteirista:
             ]
         }
     
-    def _gerar_roteiro_carrossel(self, ideia: Dict[str, Any], openai_api_key: str = None) -> Dict[str, Any]:
+    def _gerar_roteiro_carrossel(self, ideia: Dict[str, Any], openai_api_key: str = None,
+                                 cta_final: str = None) -> Dict[str, Any]:
         """
         Gera roteiro para Carrossel (Instagram)
         Formato: 9:16 por slide
         """
         
         tema_refinado = self._refinar_tema(ideia["tema"])
-        cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
-        
-        segmentos = [
-            {
-                "nome": "Slide 1 - Capa",
-                "titulo": "5 Passos para Organizar seu Orçamento",
-                "texto_curto": "Método simples e prático",
-                "texto_na_tela": "SWIPE PARA VER →",
-                "sugestao_visual": "Design limpo com título destacado"
-            },
-            {
-                "nome": "Slide 2 - Passo 1",
-                "titulo": "1. ANOTE TUDO",
-                "texto_curto": "• Registre cada gasto\n• Use app ou caderno\n• Faça por 1 semana",
-                "texto_na_tela": "PASSO 1",
-                "sugestao_visual": "Ícone de anotação + bullets"
-            },
-            {
-                "nome": "Slide 3 - Passo 2",
-                "titulo": "2. CATEGORIZE",
-                "texto_curto": "• Alimentação\n• Transporte\n• Lazer\n• Contas fixas",
-                "texto_na_tela": "PASSO 2",
-                "sugestao_visual": "Ícones de categorias"
-            }
-            # Adicionar mais slides conforme necessário
-        ]
+        if cta_final is None:
+            cta_final = self._gerar_cta_final(ideia["cta"], openai_api_key=openai_api_key)
+        
+        segmentos = _copiar_segmentos(_SEGMENTOS_CARROSSEL)
+        
+        legenda = _ajustar_para_kpi(ideia["kpi_principal"], segmentos, f"💰 {tema_refinado}\n\nSalve este post e siga o passo a passo!\n\n{cta_final}\n\n❓ Qual passo você vai começar hoje?")
         
         return {
             "formato": ideia["formato"],
@@ -362,8 +831,8 @@ class FinanceIARoteirista:
             },
             "segmentos": segmentos,
             "meta_publicacao": {
-                "legenda": f"💰 {tema_refinado}\n\nSalve este post e siga o passo a passo!\n\n{cta_final}\n\n❓ Qual passo você vai começar hoje?",
-                "hashtags": ["#educacaofinanceira", "#orcamento", "#dicas"],
+                "legenda": legenda,
+                "hashtags": list(_HASHTAGS_CARROSSEL),
                 "thumb_titulo": "Organize seu Orçamento"
             },
             "assets_sugeridos": [
@@ -381,14 +850,20 @@ class FinanceIARoteirista:
         
         tema_refinado = self._refinar_tema(ideia["tema"])
         
-        post_texto = f"💰 DICA DO DIA: {tema_refinado}\n\n" + \
-                    "Hoje vou te ensinar uma técnica simples que pode economizar até R$ 200 por mês no seu orçamento.\n\n" + \
-                    "🎯 A TÉCNICA DOS 3 POTES:\n" + \
-                    "1️⃣ Pote ESSENCIAL (50% da renda)\n" + \
-                    "2️⃣ Pote DIVERSÃO (30% da renda)\n" + \
-                    "3️⃣ Pote FUTURO (20% da renda)\n\n" + \
-                    "✅ Comece hoje mesmo separando seu dinheiro assim!\n\n" + \
-                    "👥 Quer mais dicas como essa? Entre na nossa comunidade gratuita!"
+        # Literais adjacentes são unidos na compilação: uma única f-string, sem concatenações em tempo de execução
+        post_texto = (
+            f"💰 DICA DO DIA: {tema_refinado}\n\n"
+            "Hoje vou te ensinar uma técnica simples que pode economizar até R$ 200 por mês no seu orçamento.\n\n"
+            "🎯 A TÉCNICA DOS 3 POTES:\n"
+            "1️⃣ Pote ESSENCIAL (50% da renda)\n"
+            "2️⃣ Pote DIVERSÃO (30% da renda)\n"
+            "3️⃣ Pote FUTURO (20% da renda)\n\n"
+            "✅ Comece hoje mesmo separando seu dinheiro assim!\n\n"
+            "👥 Quer mais dicas como essa? Entre na nossa comunidade gratuita!"
+        )
+        
+        # Sem segmentos: só a legenda recebe ajuste de KPI
+        legenda = _ajustar_para_kpi(ideia["kpi_principal"], (), post_texto)
         
         return {
             "formato": ideia["formato"],
@@ -412,8 +887,8 @@ class FinanceIARoteirista:
             "call_to_action": "Entre na comunidade e receba dicas diárias!",
             "resumo_do_dia": "Lembre-se: pequenos ajustes no orçamento geram grandes resultados!",
             "meta_publicacao": {
-                "legenda": post_texto,
-                "hashtags": ["#educacaofinanceira", "#orcamento", "#telegram"],
+                "legenda": legenda,
+                "hashtags": list(_HASHTAGS_POST_TELEGRAM),
                 "thumb_titulo": "Técnica dos 3 Potes"
             },
             "assets_sugeridos": [
@@ -431,32 +906,9 @@ class FinanceIARoteirista:
         
         tema_refinado = self._refinar_tema(ideia["tema"])
         
-        segmentos = [
-            {
-                "nome": "Card 1",
-                "texto": "Você gasta mais do que ganha?",
-                "narracao": "Se você respondeu sim, este stories é para você!",
-                "visual_sugestoes": ["pergunta destacada", "emoji de dinheiro"],
-                "sticker_interativo": "enquete: Sim/Não",
-                "cta": "Responda a enquete"
-            },
-            {
-                "nome": "Card 2",
-                "texto": "REGRA 50-30-20",
-                "narracao": "50% essencial, 30% diversão, 20% futuro",
-                "visual_sugestoes": ["gráfico simples", "percentuais destacados"],
-                "sticker_interativo": "slider: Quanto você poupa?",
-                "cta": "Deslize para ver mais"
-            },
-            {
-                "nome": "Card 3",
-                "texto": "COMECE HOJE!",
-                "narracao": "Separe seu dinheiro em 3 categorias agora mesmo",
-                "visual_sugestoes": ["call to action", "seta apontando"],
-                "sticker_interativo": "pergunta: Qual sua meta de economia?",
-                "cta": "Entre na comunidade para mais dicas"
-            }
-        ]
+        segmentos = _copiar_segmentos(_SEGMENTOS_STORIES_STATUS)
+        
+        legenda = _ajustar_para_kpi(ideia["kpi_principal"], segmentos, f"💰 {tema_refinado} - Stories com dica rápida!")
         
         return {
             "formato": ideia["formato"],
@@ -474,8 +926,8 @@ class FinanceIARoteirista:
             },
             "segmentos": segmentos,
             "meta_publicacao": {
-                "legenda": f"💰 {tema_refinado} - Stories com dica rápida!",
-                "hashtags": ["#stories", "#educacaofinanceira", "#dicasrapidas"],
+                "legenda": legenda,
+                "hashtags": list(_HASHTAGS_STORIES_STATUS),
                 "thumb_titulo": "Dica Rápida de Orçamento"
             },
             "assets_sugeridos": [
@@ -486,40 +938,12 @@ class FinanceIARoteirista:
             ]
         }
     
-    def _aplicar_ajustes_kpi(self, roteiro: Dict[str, Any], kpi: str) -> Dict[str, Any]:
-        """
-        Aplica ajustes específicos baseados no KPI principal
-        """
-        
-        if kpi == "CTR":
-            # CTA no meio e final, reforçar benefício claro
-            if "segmentos" in roteiro:
-                meio = len(roteiro["segmentos"]) // 2
-                if meio < len(roteiro["segmentos"]):
-                    # Verificar se o segmento tem 'narracao' (Reel/YouTube) ou 'texto_curto' (Carrossel)
-                    if "narracao" in roteiro["segmentos"][meio]:
-                        roteiro["segmentos"][meio]["narracao"] += " Link na bio para mais dicas!"
-                    elif "texto_curto" in roteiro["segmentos"][meio]:
-                        roteiro["segmentos"][meio]["texto_curto"] += "\n• Link na bio!"
-        
-        elif kpi == "Salvamentos":
-            # Checklist em 3 passos e bullets copiáveis
-            roteiro["meta_publicacao"]["legenda"] += "\n\n📋 SALVE ESTE POST para não esquecer!"
-        
-        elif kpi == "Retenção":
-            # Open loop no início e variação visual
-            if "segmentos" in roteiro and len(roteiro["segmentos"]) > 0:
-                primeiro_segmento = roteiro["segmentos"][0]
-                primeiro_segmento["narracao"] = "O erro #2 é o mais comum... " + primeiro_segmento["narracao"]
-        
-        return roteiro
-    
     def _gerar_narracao_segmento(self, nome_segmento: str, tema: str, persona: str, 
                                  duracao_s: int, ajustes_kpi: Dict[str, Any], openai_api_key: str = None) -> str:
         """
         Gera narração para um segmento específico usando OpenAI
         """
-        if self.openai_disponivel:
+        if self._chave_openai(openai_api_key):
             # Construir prompt detalhado para OpenAI
             kpi_instrucoes = ""
             if ajustes_kpi.get("cta_meio") and nome_segmento in ["Passo 2", "Exemplo"]:
@@ -547,32 +971,9 @@ class FinanceIARoteirista:
             
             return self._gerar_conteudo_com_openai(prompt, openai_api_key=openai_api_key, max_tokens=150)
         
-        # Fallback básico
-        templates = {
-            "Hook": [
-                f"Você sabia que {tema.lower()}? Vou te mostrar como resolver isso.",
-                f"Pare tudo! {tema} pode mudar sua vida financeira.",
-                f"Atenção: {tema} - vou te ensinar o passo a passo."
-            ],
-            "Contexto": [
-                f"Muitas pessoas enfrentam dificuldades com {tema.lower()}.",
-                f"O problema é que {tema.lower()} não é ensinado nas escolas.",
-                f"Vamos entender por que {tema.lower()} é tão importante."
-            ],
-            "Passo": [
-                "Primeiro passo: organize suas informações.",
-                "Segundo passo: defina suas prioridades.",
-                "Terceiro passo: coloque em prática."
-            ],
-            "CTA": [
-                "Quer aprender mais? Entre na nossa comunidade gratuita!",
-                "Gostou do conteúdo? Compartilhe com quem precisa!",
-                "Tem dúvidas? Comenta aqui embaixo!"
-            ]
-        }
-        
-        opcoes = templates.get(nome_segmento, templates["Passo"])
-        narracao_base = opcoes[0]
+        # Fallback básico (só a opção escolhida é formatada)
+        opcoes = _NARRACOES_BASE.get(nome_segmento, _NARRACOES_BASE["Passo"])
+        narracao_base = opcoes[0].format(tema=tema, tema_minusculo=tema.lower())
         
         # Aplicar ajustes de KPI
         if ajustes_kpi.get("cta_meio") and nome_segmento in ["Passo 2", "Exemplo"]:
@@ -596,51 +997,74 @@ class FinanceIARoteirista:
             Conteúdo gerado ou fallback básico
         """
         # Usar chave fornecida ou fallback para sessão atual
-        api_key = openai_api_key or self._openai_key_for_session
+        api_key = self._chave_openai(openai_api_key)
+        
+        if not api_key:
+            return self._gerar_conteudo_basico(prompt)
         
-        if not api_key or not openai:
+        try:
+            # Resposta vazia também cai para o fallback
+            return _completar_openai(prompt, max_tokens, api_key) or self._gerar_conteudo_basico(prompt)
+            
+        except _ERROS_OPENAI as e:
+            print(f"Erro ao usar OpenAI: {e}")
             return self._gerar_conteudo_basico(prompt)
+    
+    def _gerar_conteudo_com_openai_stream(self, prompt: str, openai_api_key: str = None, max_tokens: int = 1000) -> Iterator[str]:
+        """
+        Gera conteúdo com a OpenAI em modo streaming, entregando cada pedaço assim que chega
+        
+        Args:
+            prompt: Prompt para geração de conteúdo
+            openai_api_key: Chave da API OpenAI (não armazenada)
+            max_tokens: Número máximo de tokens
+            
+        Yields:
+            Pedaços do conteúdo gerado (ou o fallback básico, se nada foi gerado)
+        """
+        api_key = self._chave_openai(openai_api_key)
         
+        if not api_key:
+            yield self._gerar_conteudo_basico(prompt)
+            return
+        
+        gerou = False
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
+            from openai_config import get_openai_client
+            client = get_openai_client(api_key)
             
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em educação financeira e roteirista de conteúdo. Crie conteúdo didático, empático e prático em português do Brasil para pessoas leigas em finanças. Use frases curtas, verbos de ação e evite jargões técnicos."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            stream = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=_mensagens_openai(prompt),
                 max_tokens=max_tokens,
                 temperature=0.7,
                 top_p=1,
                 frequency_penalty=0,
-                presence_penalty=0
+                presence_penalty=0,
+                stream=True
             )
             
-            return response.choices[0].message.content.strip()
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    gerou = True
+                    yield chunk.choices[0].delta.content
             
-        except Exception as e:
+        except _ERROS_OPENAI as e:
             print(f"Erro ao usar OpenAI: {e}")
-            return self._gerar_conteudo_basico(prompt)
+            # Só cai para o fallback se nada foi entregue; um texto parcial não é misturado com ele
+            if not gerou:
+                yield self._gerar_conteudo_basico(prompt)
     
     def _gerar_visual_segmento(self, nome_segmento: str, tema: str, narracao: str, openai_api_key: str = None) -> List[str]:
         """
         Gera sugestões visuais para um segmento usando OpenAI
         """
         # Verificar se OpenAI está disponível
-        api_key = openai_api_key or self._openai_key_for_session
-        if api_key and openai:
+        if self._chave_openai(openai_api_key):
             prompt = f"""
             Sugira elementos visuais para um segmento "{nome_segmento}" sobre "{tema}".
             
-            Narração: "{narracao}"
+            Narração: "{narracao[:LIMITE_NARRACAO_PROMPT]}"
             
             Regras para elementos visuais:
             - Use categorias genéricas (ex: "ícone de orçamento", "gráfico simples")
@@ -657,27 +1081,15 @@ class FinanceIARoteirista:
             return visuais[:3]  # Garantir máximo 3
         
         # Fallback básico
-        visuais_base = {
-            "Hook": ["tipografia cinética", "ícone chamativo"],
-            "Contexto": ["gráfico simples", "ilustração conceitual"],
-            "Passo": ["ícone de passo", "bullet point"],
-            "Exemplo": ["mockup de tela", "ilustração prática"],
-            "CTA": ["botão de ação", "seta indicativa"]
-        }
-        
         # Adicionar visuais específicos baseados no tema
-        visuais_tema = []
-        if "orçamento" in tema.lower():
-            visuais_tema.extend(["ícone de orçamento", "planilha simples"])
-        elif "investimento" in tema.lower():
-            visuais_tema.extend(["gráfico de crescimento", "ícone de investimento"])
-        elif "economia" in tema.lower():
-            visuais_tema.extend(["cofre", "moedas"])
-        
-        # Combinar visuais base com específicos do tema
-        visuais = visuais_base.get(nome_segmento, ["ícone genérico"])
-        if visuais_tema:
-            visuais.extend(visuais_tema[:2])  # Máximo 2 visuais adicionais
+        tema_minusculo = tema.lower()
+        visuais_tema = next(
+            (visuais for palavra, visuais in _VISUAIS_POR_TEMA if palavra in tema_minusculo), ()
+        )
+        
+        # Combinar visuais base com específicos do tema (nova lista: a tabela é compartilhada)
+        visuais = list(_VISUAIS_BASE.get(nome_segmento, ("ícone genérico",)))
+        visuais.extend(visuais_tema[:2])  # Máximo 2 visuais adicionais
         
         return visuais[:3]  # Máximo 3 sugestões visuais
     
@@ -686,12 +1098,11 @@ class FinanceIARoteirista:
         Gera sugestões de música para um segmento usando OpenAI
         """
         # Verificar se OpenAI está disponível
-        api_key = openai_api_key or self._openai_key_for_session
-        if api_key and openai:
+        if self._chave_openai(openai_api_key):
             prompt = f"""
             Sugira música/áudio para um segmento "{nome_segmento}" sobre "{tema}".
             
-            Narração: "{narracao}"
+            Narração: "{narracao[:LIMITE_NARRACAO_PROMPT]}"
             
             Regras para música:
             - Especifique apenas mood e BPM
@@ -708,51 +1119,21 @@ class FinanceIARoteirista:
             musica = {"mood": "otimista", "bpm": "100-110", "tipo": "biblioteca sem direitos"}
             sfx = []
             
-            if "mood:" in resposta:
-                mood_start = resposta.find("mood:") + 5
-                mood_end = resposta.find(",", mood_start)
-                if mood_end == -1:
-                    mood_end = resposta.find("\n", mood_start)
-                if mood_end == -1:
-                    mood_end = len(resposta)
-                musica["mood"] = resposta[mood_start:mood_end].strip()
-            
-            if "bpm:" in resposta:
-                 bpm_start = resposta.find("bpm:") + 4
-                 bpm_end = resposta.find(",", bpm_start)
-                 if bpm_end == -1:
-                     bpm_end = resposta.find("\n", bpm_start)
-                 if bpm_end == -1:
-                     bpm_end = len(resposta)
-                 musica["bpm"] = resposta[bpm_start:bpm_end].strip()
-            
-            if "sfx:" in resposta:
-                sfx_start = resposta.find("sfx:") + 4
-                sfx_text = resposta[sfx_start:].strip()
+            # mood/bpm vão até a vírgula ou quebra de linha; sfx vai até o fim da resposta
+            campos = _campos_rotulados(_MUSICA_RE, resposta)
+            for chave in ("mood", "bpm"):
+                if chave in campos:
+                    musica[chave] = campos[chave].group(2).strip()
+            if "sfx" in campos:
+                sfx_text = resposta[campos["sfx"].start(2):].strip()
                 if sfx_text and sfx_text != "nenhum":
                     sfx = [sfx_text]
             
             return {"musica_sugestao": musica, "sfx_sugestao": sfx}
         
-        # Fallback básico
-        musicas_base = {
-            "Hook": {"mood": "empolgante", "bpm": "110-120"},
-            "Contexto": {"mood": "reflexivo", "bpm": "80-90"},
-            "Passo": {"mood": "focado", "bpm": "95-105"},
-            "Exemplo": {"mood": "prático", "bpm": "100-110"},
-            "CTA": {"mood": "convidativo", "bpm": "100-110"}
-        }
-        
-        musica = musicas_base.get(nome_segmento, {"mood": "otimista", "bpm": "100-110"})
-        musica["tipo"] = "biblioteca sem direitos"
-        
-        sfx_base = {
-            "Hook": ["whoosh"],
-            "Passo": ["click suave"],
-            "CTA": ["chime"]
-        }
-        
-        sfx = sfx_base.get(nome_segmento, [])
+        # Fallback básico (cópias: as tabelas são compartilhadas)
+        musica = dict(_MUSICAS_BASE.get(nome_segmento, _MUSICA_PADRAO), tipo="biblioteca sem direitos")
+        sfx = list(_SFX_BASE.get(nome_segmento, ()))
         
         return {"musica_sugestao": musica, "sfx_sugestao": sfx}
     
@@ -772,56 +1153,39 @@ class FinanceIARoteirista:
     
     def _refinar_tema(self, tema_original: str) -> str:
         """
-        Refina o tema mantendo dor/desejo explícitos (máx. ~90 caracteres)
+        Refina o tema mantendo dor/desejo explícitos (máx. ~90 caracteres), com memoização
         """
-        
-        if len(tema_original) <= 90:
-            return tema_original
-        
-        # Simplificar mantendo a essência
-        palavras = tema_original.split()
-        tema_refinado = ""
-        
-        for palavra in palavras:
-            if len(tema_refinado + palavra + " ") <= 90:
-                tema_refinado += palavra + " "
-            else:
-                break
-        
-        return tema_refinado.strip()
+        return _refinar_tema_cacheado(tema_original)
+    
+    @staticmethod
+    def limpar_cache() -> None:
+        """
+        Esvazia os caches de temas refinados e de respostas da OpenAI (útil em testes)
+        """
+        _refinar_tema_cacheado.cache_clear()
+        _limpar_respostas_cache()
     
     def _gerar_cta_final(self, cta_tipo: str, openai_api_key: str = None) -> str:
         """
         Gera o texto do CTA final baseado no tipo usando OpenAI
+        Única chamada à OpenAI por roteiro: os segmentos de Reel/YouTube/Carrossel vêm de templates fixos
         """
         # Verificar se OpenAI está disponível
-        api_key = openai_api_key or self._openai_key_for_session
-        if api_key and openai:
-            prompt = f"""
-            Crie um CTA (Call to Action) para "{cta_tipo}".
-            
-            Regras para CTA:
-            - Seja direto e convidativo
-            - Use verbos de ação
-            - Mencione benefício claro
-            - Tom acolhedor, não agressivo
-            - Máximo 2 frases
-            - Português do Brasil
-            
-            Retorne apenas o CTA, sem explicações adicionais.
-            """
-            
-            return self._gerar_conteudo_com_openai(prompt, openai_api_key=openai_api_key, max_tokens=100)
+        if self._chave_openai(openai_api_key):
+            return self._gerar_conteudo_com_openai(_prompt_cta(cta_tipo), openai_api_key=openai_api_key, max_tokens=100)
         
         # Fallback básico
-        ctas = {
-            "Comunidade Telegram": "Entre na nossa comunidade gratuita do Telegram e receba dicas diárias!",
-            "WhatsApp Diagnóstico": "Faça seu diagnóstico financeiro gratuito em 5 minutos no WhatsApp!",
-            "Download Planilha": "Baixe nossa planilha gratuita de controle financeiro!",
-            "Curso Gratuito": "Inscreva-se no nosso curso gratuito de educação financeira!"
-        }
-        
-        return ctas.get(cta_tipo, "Entre na nossa comunidade gratuita do Telegram!")
+        return _CTAS_BASE.get(cta_tipo, "Entre na nossa comunidade gratuita do Telegram!")
+    
+    def _gerar_cta_final_stream(self, cta_tipo: str, openai_api_key: str = None) -> Iterator[str]:
+        """
+        Versão incremental de _gerar_cta_final: entrega o CTA em pedaços conforme a OpenAI gera
+        (sem OpenAI, entrega o CTA básico de uma vez)
+        """
+        if self._chave_openai(openai_api_key):
+            yield from self._gerar_conteudo_com_openai_stream(_prompt_cta(cta_tipo), openai_api_key=openai_api_key, max_tokens=100)
+        else:
+            yield self._gerar_cta_final(cta_tipo)
     
     def _extrair_observacoes(self, observacoes: str) -> str:
         """
@@ -831,30 +1195,87 @@ class FinanceIARoteirista:
         if not observacoes:
             return "Foco em ação prática e linguagem simples"
         
-        # Extrair dor e desejo se mencionados
-        resumo = ""
-        if "dor:" in observacoes.lower():
-            inicio_dor = observacoes.lower().find("dor:")
-            fim_dor = observacoes.find("|", inicio_dor) if "|" in observacoes[inicio_dor:] else len(observacoes)
-            dor = observacoes[inicio_dor:fim_dor].strip()
-            resumo += dor + " "
+        # Extrair dor e desejo se mencionados (cada valor vai até o próximo "|")
+        campos = _campos_rotulados(_OBSERVACOES_RE, observacoes)
+        resumo = " ".join(
+            f"{rotulo}: {campos[rotulo].group(2).strip()}".rstrip() for rotulo in ("dor", "desejo") if rotulo in campos
+        )
         
-        if "desejo:" in observacoes.lower():
-            inicio_desejo = observacoes.lower().find("desejo:")
-            fim_desejo = observacoes.find("|", inicio_desejo) if "|" in observacoes[inicio_desejo:] else len(observacoes)
-            desejo = observacoes[inicio_desejo:fim_desejo].strip()
-            resumo += desejo
-        
-        return resumo.strip() if resumo.strip() else "Foco em ação prática e linguagem simples"
+        return resumo or "Foco em ação prática e linguagem simples"
+
+
+def _validar_ideia(ideia: Any) -> None:
+    """
+    Rejeita entradas malformadas (não-objeto, campos ausentes, tema vazio) antes de qualquer geração
+    """
+    if not isinstance(ideia, dict):
+        raise ValueError("Ideia revisada deve ser um objeto JSON")
+    
+    # Caso comum (nada faltando) resolvido com um único teste de subconjunto
+    if not _CAMPOS_OBRIGATORIOS_SET <= ideia.keys():
+        faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in ideia]
+        if len(faltando) == 1:
+            raise ValueError(f"Campo obrigatório ausente: {faltando[0]}")
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+    
+    if not str(ideia["tema"]).strip():
+        raise ValueError("Campo obrigatório vazio: tema")
+
+def _ajustar_para_kpi(kpi: str, segmentos: List[Dict[str, Any]], legenda: str) -> str:
+    """
+    Aplica os ajustes do KPI principal durante a montagem do roteiro
+    Altera os segmentos (cópias do gerador) no lugar e devolve a legenda ajustada
+    """
+    
+    if kpi == "CTR":
+        # CTA no meio e final, reforçar benefício claro
+        if segmentos:
+            # 'narracao' (Reel/YouTube/Stories) ou 'texto_curto' (Carrossel)
+            segmento = segmentos[len(segmentos) // 2]
+            if "narracao" in segmento:
+                segmento["narracao"] += " Link na bio para mais dicas!"
+            elif "texto_curto" in segmento:
+                segmento["texto_curto"] += "\n• Link na bio!"
+    
+    elif kpi == "Salvamentos":
+        # Checklist em 3 passos e bullets copiáveis
+        return legenda + "\n\n📋 SALVE ESTE POST para não esquecer!"
+    
+    elif kpi == "Retenção":
+        # Open loop no início e variação visual
+        if segmentos:
+            segmento = segmentos[0]
+            # Carrossel não tem narração: o open loop vai no texto do primeiro slide
+            campo = "narracao" if "narracao" in segmento else "texto_curto"
+            segmento[campo] = "O erro #2 é o mais comum... " + segmento[campo]
+    
+    return legenda
+
+# Gerador de roteiro por formato: (método, recebe openai_api_key)
+_GERADORES_POR_FORMATO = MappingProxyType({
+    "Reel/Short": (FinanceIARoteirista._gerar_roteiro_reel_short, True),
+    "YouTube Longo": (FinanceIARoteirista._gerar_roteiro_youtube_longo, True),
+    "Carrossel": (FinanceIARoteirista._gerar_roteiro_carrossel, True),
+    "Post Telegram": (FinanceIARoteirista._gerar_roteiro_post_telegram, False),
+    "Stories/Status": (FinanceIARoteirista._gerar_roteiro_stories_status, False)
+})
+
 
+def _json_indentado(obj: Any) -> str:
+    """
+    JSON indentado em UTF-8 (mesmo formato de json.dumps(indent=2, ensure_ascii=False))
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
 
-def processar_roteiro(ideia_revisada_json: str, openai_api_key: str = None) -> str:
+def processar_roteiro(ideia_revisada_json: Union[str, bytes], openai_api_key: str = None,
+                      stream_callback: Callable[[str], None] = None) -> str:
     """
     Função principal para processar uma ideia revisada e retornar o roteiro em JSON
     
     Args:
-        ideia_revisada_json: String JSON com a ideia revisada
+        ideia_revisada_json: JSON com a ideia revisada (str, ou bytes UTF-8 lidos direto de arquivo/rede, sem decodificar)
         openai_api_key: Chave da API OpenAI (opcional)
+        stream_callback: Recebe cada pedaço do CTA assim que a OpenAI o gera (opcional)
         
     Returns:
         String JSON com o roteiro completo
@@ -862,22 +1283,32 @@ def processar_roteiro(ideia_revisada_json: str, openai_api_key: str = None) -> s
     
     try:
         # Parse da entrada
-        ideia_revisada = json.loads(ideia_revisada_json)
+        ideia_revisada = orjson.loads(ideia_revisada_json)
+        
+        # Entrada malformada: erro imediato, sem criar o roteirista nem chamar a OpenAI
+        _validar_ideia(ideia_revisada)
         
         # Criar instância do roteirista com chave da API
         roteirista = FinanceIARoteirista(openai_api_key=openai_api_key)
         
         # Processar ideia e gerar roteiro
-        resultado = roteirista.processar_ideia_revisada(ideia_revisada, openai_api_key=openai_api_key)
+        if stream_callback is None:
+            resultado = roteirista.processar_ideia_revisada(ideia_revisada, openai_api_key=openai_api_key)
+        else:
+            for evento in roteirista.processar_ideia_revisada_streaming(ideia_revisada, openai_api_key=openai_api_key):
+                if evento["evento"] == "cta_parcial":
+                    stream_callback(evento["texto"])
+                else:
+                    resultado = evento["dados"]
         
         # Retornar JSON
-        return json.dumps(resultado, ensure_ascii=False, indent=2)
+        return _json_indentado(resultado)
         
     except Exception as e:
-        return json.dumps({
+        return _json_indentado({
             "erro": f"Erro ao processar roteiro: {str(e)}",
             "status": "erro"
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 if __name__ == "__main__":
@@ -900,5 +1331,10 @@ if __name__ == "__main__":
         "observacoes": "dor: brigas por dinheiro | desejo: harmonia financeira"
     }
     
-    resultado = processar_roteiro(json.dumps(exemplo_ideia))
+    # CTA exibido no stderr conforme é gerado; o JSON final sai no stdout
+    resultado = processar_roteiro(
+        orjson.dumps(exemplo_ideia).decode(),
+        stream_callback=lambda parte: print(parte, end="", file=sys.stderr, flush=True)
+    )
+    print(file=sys.stderr)
     print(resultado)
\ No newline at end of file
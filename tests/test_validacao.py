@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes de validação de entrada da FinanceIAAPI
+Execute com: python -m unittest discover tests
+"""
+
+import unittest
+
+from main import FinanceIAAPI
+
+
+class ValidarEntradaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FinanceIAAPI()
+
+    def test_entrada_nao_objeto_e_erro_de_validacao(self):
+        for entrada in ([1], [], "texto", 42, None):
+            with self.subTest(entrada=entrada):
+                self.assertEqual(
+                    self.api.validar_entrada(entrada),
+                    {"valido": False, "erro": "Ideia deve ser um objeto JSON"}
+                )
+
+    def test_processar_json_array_retorna_entrada_invalida(self):
+        resultado = self.api.processar_ideia_json("[1]")
+        self.assertFalse(resultado["sucesso"])
+        self.assertEqual(resultado["codigo_erro"], "ENTRADA_INVALIDA")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Finance-IA - Agente Roteirista - Entrada WSGI para produção
+Aplica o monkey patch do gevent antes de importar a aplicação, para que as
+chamadas HTTP à OpenAI cedam o worker em vez de bloqueá-lo
+
+Uso: gunicorn -k gevent -w 4 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:app
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from app import app  # noqa: E402